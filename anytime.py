@@ -0,0 +1,259 @@
+"""This module contains AnytimeSearch, Anytime Repairing A* (ARA*; Likhachev,
+Gordon and Thrun, 2003) for the grids of Grid.
+
+ARA* runs weighted A* with a large weight to find a path quickly, then
+repeatedly lowers the weight and improves the path.  Each improvement
+reuses the costs found so far: only the cells whose cost dropped after
+they were expanded (kept in an INCONS set) are searched again.  The search
+can be interrupted at any time, and the path found so far comes with a
+bound on how far it can be from the optimum.
+"""
+
+import time
+
+from search import NEIGHBOURS, open_list, SearchWorkspace, SparseWorkspace
+
+
+class AnytimeSearch:
+    """
+    A resumable ARA* search between two cells of a Grid.
+
+    === Attributes: ===
+    @type start: int
+       the cell the search starts from
+    @type target: int
+       the cell the search is looking for
+    @type epsilon: float
+       the heuristic is inflated by 1 + epsilon in the current iteration
+    @type expanded: int
+       the number of cells expanded by all calls to improve so far
+
+    === Private Attributes: ===
+    @type _grid: Grid
+       the grid searched
+    @type _step: float
+       how much epsilon is lowered after each completed iteration
+    @type _ws: SearchWorkspace | SparseWorkspace
+       the costs and parents of the search, kept between calls; seen
+       stays at the workspace's first generation, while closed is stamped
+       with the current iteration
+    @type _iteration: int
+       the number of the current iteration
+    @type _h: Callable[[int], int]
+       the heuristic towards target
+    @type _opens: IndexedPriorityQueue
+       the open list of the current iteration
+    @type _key: Callable[[int], int]
+       the key of a cell in _opens
+    @type _queued: Set[int]
+       the cells in _opens
+    @type _incons: Set[int]
+       the cells whose cost dropped after they were expanded in the current
+       iteration
+    @type _proven: float | None
+       the bound of the last completed iteration, or None if there is none
+    """
+    def __init__(self, grid, start, target, epsilon=3.0, step=0.5):
+        """
+        Initialize a search from cell <start> to cell <target> of <grid>,
+        beginning with weight 1 + epsilon
+
+        @type self: AnytimeSearch
+        @type grid: Grid
+        @type start: int
+        @type target: int
+        @type epsilon: float
+        @type step: float
+        @rtype: None
+        """
+        if epsilon < 0 or step <= 0:
+            raise ValueError("epsilon must not be negative and step must be "
+                             "positive")
+        self._grid = grid
+        self.start = start
+        self.target = target
+        self.epsilon = epsilon
+        self._step = step
+        self.expanded = 0
+        self._h = grid.heuristic(target)
+        #a workspace of its own, since closed holds iteration numbers; only
+        #the cells touched are kept on tiled and compressed maps
+        workspace = SparseWorkspace if grid._sparse else SearchWorkspace
+        self._ws = workspace(len(grid.terrain))
+        self._ws.reset()
+        self._ws.seen[start] = self._ws.generation
+        self._ws.gcost[start] = 0
+        self._ws.parent[start] = -1
+        self._iteration = 1
+        self._queued = {start}
+        self._incons = set()
+        self._proven = None
+        self._open_iteration()
+
+    def _open_iteration(self):
+        """
+        Queue the open and inconsistent cells with the keys of the current
+        epsilon
+
+        @type self: AnytimeSearch
+        @rtype: None
+        """
+        gcost = self._ws.gcost
+        h = self._h
+        #keep the keys integers, as find_path's weighted A* does
+        weight = int((1 + self.epsilon) * 1000)
+        self._key = lambda i: 1000 * gcost[i] + weight * h(i)
+        self._queued |= self._incons
+        self._incons = set()
+        self._opens = open_list("heap", self._key, self._queued)
+
+    def _goal_key(self):
+        """
+        Return the key of the target, or None if it has not been reached
+
+        @type self: AnytimeSearch
+        @rtype: int | None
+        """
+        if self._ws.seen[self.target] != self._ws.generation:
+            return None
+        return 1000 * self._ws.gcost[self.target]
+
+    def bound(self):
+        """
+        Return the factor by which the path found so far may exceed the
+        optimum, or None if no path has been found yet
+
+        @type self: AnytimeSearch
+        @rtype: float | None
+        """
+        if self._goal_key() is None:
+            return None
+        cost = self._ws.gcost[self.target]
+        if self._proven == 1 or cost == 0:
+            return 1
+        #every path not yet found passes through an open or inconsistent
+        #cell, so the smallest g + h among them is a lower bound
+        gcost = self._ws.gcost
+        lower = min((gcost[i] + self._h(i)
+                     for i in self._queued | self._incons), default=cost)
+        bound = max(1, cost / lower)
+        if self._proven is not None:
+            bound = min(bound, self._proven)
+        return bound
+
+    def done(self):
+        """
+        Return True iff the search can no longer improve its path
+
+        @type self: AnytimeSearch
+        @rtype: bool
+        """
+        return self._proven == 1
+
+    def improve(self, time_budget=None, max_expansions=None):
+        """
+        Improve the path until it is optimal, time_budget seconds have
+        passed or max_expansions cells have been expanded
+
+        Return (cells, cost, expanded, bound) for the best path found so
+        far, where cells and cost are None if there is none yet, expanded
+        counts every cell expanded since the search began and bound is as
+        in bound().
+
+        @type self: AnytimeSearch
+        @type time_budget: float | None
+        @type max_expansions: int | None
+        @rtype: (List[int] | None, int | None, int, float | None)
+
+        >>> from grid import Grid
+        >>> g = Grid("", ["B.....", "......", "+++++.", "T....."])
+        >>> search = AnytimeSearch(g, 0, 18, 2.0)
+        >>> cells, cost, expanded, bound = search.improve()
+        >>> cost, bound, search.done()
+        (112, 1, True)
+        """
+        deadline = None
+        if time_budget is not None:
+            deadline = time.monotonic() + time_budget
+        budget = max_expansions
+        grid = self._grid
+        width = grid.width
+        height = grid.height
+        terrain = grid.terrain
+        ws = self._ws
+        gcost = ws.gcost
+        parent = ws.parent
+        seen = ws.seen
+        closed = ws.closed
+        stamp = ws.generation
+        while not self.done():
+            opens = self._opens
+            iteration = self._iteration
+            #expand cells while one is keyed below the target
+            while not opens.is_empty():
+                goal = self._goal_key()
+                if goal is not None and goal <= self._key(opens.peek()):
+                    break
+                if budget is not None and budget <= 0:
+                    return self._result()
+                if deadline is not None and time.monotonic() >= deadline:
+                    return self._result()
+                q = opens.remove()
+                self._queued.discard(q)
+                closed[q] = iteration
+                self.expanded += 1
+                if budget is not None:
+                    budget -= 1
+                qx = q % width
+                qy = q // width
+                qg = gcost[q]
+                for dx, dy in NEIGHBOURS:
+                    x = qx + dx
+                    y = qy + dy
+                    if not (0 <= x < width and 0 <= y < height):
+                        continue
+                    i = y * width + x
+                    if not terrain[i]:
+                        continue
+                    g = qg + (14 if dx and dy else 10)
+                    if seen[i] == stamp and gcost[i] <= g:
+                        continue
+                    seen[i] = stamp
+                    gcost[i] = g
+                    parent[i] = q
+                    if closed[i] == iteration:
+                        #already expanded with this weight, so wait for the next
+                        self._incons.add(i)
+                    elif i in self._queued:
+                        opens.decrease_key(i)
+                    else:
+                        self._queued.add(i)
+                        opens.add(i)
+            #the iteration is complete: its path is within 1 + epsilon
+            self._proven = 1 + self.epsilon
+            if self.epsilon == 0:
+                self._proven = 1
+                break
+            self.epsilon = max(0, self.epsilon - self._step)
+            self._iteration += 1
+            self._open_iteration()
+        return self._result()
+
+    def _result(self):
+        """
+        Return (cells, cost, expanded, bound) for the best path found so far
+
+        @type self: AnytimeSearch
+        @rtype: (List[int] | None, int | None, int, float | None)
+        """
+        bound = self.bound()
+        if bound is None:
+            return None, None, self.expanded, None
+        ws = self._ws
+        cells = []
+        i = self.target
+        while i != -1:
+            cells.append(i)
+            i = ws.parent[i]
+        cells.reverse()
+        return cells, ws.gcost[self.target], self.expanded, bound
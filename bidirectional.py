@@ -0,0 +1,175 @@
+"""This module contains bidirectional A* for the grids of Grid.
+
+One A* search runs forward from the start towards the target while another
+runs backward from the target towards the start; steps cost the same in
+both directions, so the backward search uses the same neighbours.  Each
+round expands a node of the search with the smaller open list.  Whenever a
+search reaches a node the other one has already reached, the two halves
+form a path, and the best such path is kept.  The search stops once the
+smallest fcost of either open list is no smaller than that path: every
+path not yet found must then cost at least as much, so the path kept is
+a shortest one.
+"""
+
+from search import NEIGHBOURS, octile, open_list
+
+
+class _Frontier:
+    """
+    The state of one direction of a bidirectional search.
+
+    === Attributes: ===
+    @type ws: SearchWorkspace
+       the per-cell state of this direction
+    @type stamp: int
+       the generation of this search in ws
+    @type opens: IndexedPriorityQueue | BucketQueue
+       the open list, ordered by fcost towards goal
+    @type goal: int
+       the cell this direction searches towards
+    """
+    def __init__(self, ws, source, goal, width, queue):
+        """
+        Initialize a frontier searching from cell <source> towards cell
+        <goal>
+
+        @type self: _Frontier
+        @type ws: SearchWorkspace
+        @type source: int
+        @type goal: int
+        @type width: int
+        @type queue: str
+        @rtype: None
+        """
+        self.ws = ws
+        self.stamp = ws.reset()
+        self.goal = goal
+        gx = goal % width
+        gy = goal // width
+        gcost = ws.gcost
+        self.fcost = lambda i: gcost[i] + octile(abs(i % width - gx),
+                                                 abs(i // width - gy))
+        self.opens = open_list(queue, self.fcost)
+        ws.seen[source] = self.stamp
+        ws.gcost[source] = 0
+        ws.parent[source] = -1
+        self.opens.add(source)
+
+    def reached(self, i):
+        """
+        Return True iff this direction has reached cell <i>
+
+        @type self: _Frontier
+        @type i: int
+        @rtype: bool
+        """
+        return self.ws.seen[i] == self.stamp
+
+    def min_fcost(self):
+        """
+        Return the smallest fcost in the open list, or None if it is empty
+
+        @type self: _Frontier
+        @rtype: int | None
+        """
+        if self.opens.is_empty():
+            return None
+        return self.fcost(self.opens.peek())
+
+
+def bidirectional_search(grid, start, target, queue="heap"):
+    """
+    Search <grid> for a shortest path from cell <start> to cell <target>
+    from both ends at once
+
+    Return a tuple (cells, cost, expanded) as the engines of Grid.find_path
+    do.
+
+    @type grid: Grid
+    @type start: int
+    @type target: int
+    @type queue: str
+       "heap" or "bucket", see search.open_list
+    @rtype: (List[int] | None, int | None, int)
+
+    >>> from grid import Grid
+    >>> g = Grid("", ["B.....", "......", "+++++.", "T....."])
+    >>> cells, cost, expanded = bidirectional_search(g, 0, 18)
+    >>> cost, len(cells)
+    (112, 11)
+    """
+    width = grid.width
+    height = grid.height
+    terrain = grid.terrain
+    forward = _Frontier(grid.search_workspace("forward"), start, target,
+                        width, queue)
+    backward = _Frontier(grid.search_workspace("backward"), target, start,
+                         width, queue)
+    #the cost of the best path found so far and the cell where its halves meet
+    best = None
+    meet = -1
+    if start == target:
+        best = 0
+        meet = start
+    expanded = 0
+    while True:
+        low_forward = forward.min_fcost()
+        low_backward = backward.min_fcost()
+        #an exhausted direction has seen every cell it can reach
+        if low_forward is None or low_backward is None:
+            break
+        if best is not None and best <= max(low_forward, low_backward):
+            break
+        #expand a node of the direction with the smaller open list
+        if len(forward.opens) <= len(backward.opens):
+            side, other = forward, backward
+        else:
+            side, other = backward, forward
+        ws = side.ws
+        stamp = side.stamp
+        q = side.opens.remove()
+        ws.closed[q] = stamp
+        expanded += 1
+        qx = q % width
+        qy = q // width
+        qg = ws.gcost[q]
+        for dx, dy in NEIGHBOURS:
+            x = qx + dx
+            y = qy + dy
+            if not (0 <= x < width and 0 <= y < height):
+                continue
+            i = y * width + x
+            if not terrain[i] or ws.closed[i] == stamp:
+                continue
+            g = qg + (14 if dx and dy else 10)
+            if ws.seen[i] == stamp:
+                if ws.gcost[i] <= g:
+                    continue
+                ws.gcost[i] = g
+                ws.parent[i] = q
+                side.opens.decrease_key(i)
+            else:
+                ws.seen[i] = stamp
+                ws.gcost[i] = g
+                ws.parent[i] = q
+                side.opens.add(i)
+            #the two searches meet at i
+            if other.reached(i):
+                total = g + other.ws.gcost[i]
+                if best is None or total < best:
+                    best = total
+                    meet = i
+    if best is None:
+        return None, None, expanded
+    #join the forward half up to the meeting cell and the backward half
+    cells = []
+    i = meet
+    while i != -1:
+        cells.append(i)
+        i = forward.ws.parent[i]
+    cells.reverse()
+    i = backward.ws.parent[meet]
+    while i != -1:
+        cells.append(i)
+        i = backward.ws.parent[i]
+    return cells, best, expanded
@@ -0,0 +1,245 @@
+"""This module contains DStarLite, an incremental planner (D* Lite; Koenig
+and Likhachev, 2002) for the grids of Grid.
+
+D* Lite searches backwards from the target, keeping for every cell it has
+touched its cost g to the target and a one-step lookahead rhs.  When cells
+change between navigable and island, only the cells next to them are
+updated, and the search re-expands just the cells whose costs actually
+change, instead of searching the whole map again.  The boat may move
+between plans: the key modifier km keeps the queued keys valid without
+requeueing them.
+"""
+
+from search import NEIGHBOURS, octile, open_list
+
+#the cost of a path that does not exist
+INFINITY = float("inf")
+
+
+class DStarLite:
+    """
+    An incremental shortest-path planner from a moving start cell to a fixed
+    target cell of a Grid.
+
+    === Attributes: ===
+    @type start: int
+       the cell paths are planned from
+    @type target: int
+       the cell paths are planned to
+    @type expanded: int
+       the number of cells expanded by the last call to plan
+
+    === Private Attributes: ===
+    @type _grid: Grid
+       the grid planned on
+    @type _g: Dict[int, int]
+       the cost from each cell to target, where missing cells cost INFINITY
+    @type _rhs: Dict[int, int]
+       the cost from each cell to target through its best neighbour
+    @type _keys: Dict[int, (int, int)]
+       the key each queued cell was queued with
+    @type _opens: IndexedPriorityQueue
+       the inconsistent cells, ordered by their keys
+    @type _km: int
+       how far the start has moved in total, in heuristic terms
+    @type _last: int
+       the start cell when the keys were last adjusted by _km
+
+    === Representation invariants ===
+    - a cell is queued iff its g and rhs differ
+    """
+    def __init__(self, grid, start, target):
+        """
+        Initialize a planner from cell <start> to cell <target> of <grid>
+
+        @type self: DStarLite
+        @type grid: Grid
+        @type start: int
+        @type target: int
+        @rtype: None
+        """
+        self._grid = grid
+        self.start = start
+        self.target = target
+        self.expanded = 0
+        self._g = {}
+        self._rhs = {target: 0}
+        self._keys = {}
+        self._opens = open_list("heap", self._keys.__getitem__)
+        self._km = 0
+        self._last = start
+        self._queue(target)
+
+    def _h(self, a, b):
+        """
+        Return the octile distance between cells <a> and <b>
+
+        @type self: DStarLite
+        @type a: int
+        @type b: int
+        @rtype: int
+        """
+        width = self._grid.width
+        return octile(abs(a % width - b % width), abs(a // width - b // width))
+
+    def _key(self, i):
+        """
+        Return the key of cell <i>
+
+        @type self: DStarLite
+        @type i: int
+        @rtype: (int, int)
+        """
+        m = min(self._g.get(i, INFINITY), self._rhs.get(i, INFINITY))
+        return (m + self._h(self.start, i) + self._km, m)
+
+    def _queue(self, i):
+        """
+        Queue cell <i> with its current key, replacing any older entry
+
+        @type self: DStarLite
+        @type i: int
+        @rtype: None
+        """
+        self._keys[i] = self._key(i)
+        self._opens.add(i)
+
+    def _neighbours(self, i):
+        """
+        Return the navigable neighbours of cell <i> with their step costs,
+        or no neighbours if cell i is an island
+
+        @type self: DStarLite
+        @type i: int
+        @rtype: List[(int, int)]
+        """
+        grid = self._grid
+        width = grid.width
+        terrain = grid.terrain
+        if not terrain[i]:
+            return []
+        qx = i % width
+        qy = i // width
+        steps = []
+        for dx, dy in NEIGHBOURS:
+            x = qx + dx
+            y = qy + dy
+            if (0 <= x < width and 0 <= y < grid.height
+                    and terrain[y * width + x]):
+                steps.append((y * width + x, 14 if dx and dy else 10))
+        return steps
+
+    def _update(self, i):
+        """
+        Recompute the rhs of cell <i> and requeue it if it is inconsistent
+
+        @type self: DStarLite
+        @type i: int
+        @rtype: None
+        """
+        if i != self.target:
+            g = self._g
+            rhs = min((cost + g.get(j, INFINITY)
+                       for j, cost in self._neighbours(i)), default=INFINITY)
+            if rhs == INFINITY:
+                self._rhs.pop(i, None)
+            else:
+                self._rhs[i] = rhs
+        self._opens.discard(i)
+        self._keys.pop(i, None)
+        if self._g.get(i, INFINITY) != self._rhs.get(i, INFINITY):
+            self._queue(i)
+
+    def move_start(self, start):
+        """
+        Plan from cell <start> from now on, as the boat has moved there
+
+        @type self: DStarLite
+        @type start: int
+        @rtype: None
+        """
+        self._km += self._h(self._last, start)
+        self._last = start
+        self.start = start
+
+    def cells_changed(self, cells):
+        """
+        Update the planner after <cells> have turned from navigable into
+        islands or back
+
+        @type self: DStarLite
+        @type cells: Iterable[int]
+        @rtype: None
+        """
+        grid = self._grid
+        width = grid.width
+        for i in cells:
+            #every step into or out of i has changed cost
+            qx = i % width
+            qy = i // width
+            self._update(i)
+            for dx, dy in NEIGHBOURS:
+                x = qx + dx
+                y = qy + dy
+                if 0 <= x < width and 0 <= y < grid.height:
+                    self._update(y * width + x)
+
+    def plan(self):
+        """
+        Repair the costs after any changes and return (cells, cost,
+        expanded) for a shortest path from start to target, as the engines
+        of Grid.find_path do
+
+        @type self: DStarLite
+        @rtype: (List[int] | None, int | None, int)
+
+        >>> from grid import Grid
+        >>> g = Grid("", ["B...", "....", "T..."])
+        >>> planner = DStarLite(g, 0, 8)
+        >>> planner.plan()[1]
+        20
+        >>> g.terrain[4] = 0
+        >>> planner.cells_changed([4])
+        >>> planner.plan()[1]
+        28
+        """
+        g = self._g
+        rhs = self._rhs
+        opens = self._opens
+        keys = self._keys
+        start = self.start
+        expanded = 0
+        while not opens.is_empty():
+            top = opens.peek()
+            old = keys[top]
+            if (old >= self._key(start) and
+                    rhs.get(start, INFINITY) == g.get(start, INFINITY)):
+                break
+            new = self._key(top)
+            if old < new:
+                #the start has moved since top was queued
+                self._queue(top)
+                continue
+            opens.remove()
+            del keys[top]
+            expanded += 1
+            if g.get(top, INFINITY) > rhs.get(top, INFINITY):
+                g[top] = rhs[top]
+                for i, _ in self._neighbours(top):
+                    self._update(i)
+            else:
+                g.pop(top, None)
+                self._update(top)
+                for i, _ in self._neighbours(top):
+                    self._update(i)
+        self.expanded = expanded
+        cost = g.get(start, INFINITY)
+        if cost == INFINITY:
+            return None, None, expanded
+        #descend the costs from the start to the target
+        cells = [start]
+        while cells[-1] != self.target:
+            step = min(self._neighbours(cells[-1]),
+                       key=lambda step: step[1] + g.get(step[0], INFINITY))
+            cells.append(step[0])
+        return cells, cost, expanded
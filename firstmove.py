@@ -0,0 +1,255 @@
+"""This module contains FirstMoveTable, a compressed path database for the
+grids of Grid (Botea, 2011).
+
+For every navigable source cell, the table stores the first step of a
+shortest path from the source to every other cell.  A path is then read
+off one step at a time: take the first move from the start towards the
+target, and repeat from the cell it leads to.  No search is needed at
+query time.
+
+Each source's row lists a move for every cell in index order, and
+neighbouring cells usually share their first move, so rows are stored
+run-length encoded and looked up with a binary search over the run starts.
+Islands are never targets, so they join whichever run is next to them.
+
+Computing the table takes one Dijkstra search per navigable cell, so it is
+meant to be done once, offline, and saved with the map; see
+FirstMoveTable.save and FirstMoveTable.load.
+"""
+
+from array import array
+from bisect import bisect_right
+import struct
+import sys
+import zlib
+
+from search import NEIGHBOURS, DistanceField
+
+#the move stored for cells that cannot be reached from the source
+NO_MOVE = len(NEIGHBOURS)
+#the header of a saved table: magic, version, width, height, terrain checksum
+HEADER = struct.Struct("<4sHIII")
+MAGIC = b"FMT\x00"
+VERSION = 1
+
+
+class FirstMoveTable:
+    """
+    The first move of a shortest path between every pair of cells of a Grid.
+
+    === Attributes: ===
+    @type width: int
+       the width of the grid
+    @type height: int
+       the height of the grid
+    @type checksum: int
+       the CRC-32 of the grid's terrain, used to match a saved table to
+       its map
+
+    === Private Attributes: ===
+    @type _grid: Grid
+       the grid this table describes
+    @type _starts: List[array]
+       _starts[s] lists the first cell of each run of source s's row
+    @type _moves: List[array]
+       _moves[s][k] is the index in NEIGHBOURS of the first move from s
+       to every cell of run k, or NO_MOVE
+
+    === Representation invariants ===
+    - _starts[s] is strictly increasing and starts at 0, unless it is empty
+    - len(_starts[s]) == len(_moves[s])
+    """
+    def __init__(self, grid, rows=None):
+        """
+        Initialize the first-move table of <grid>, computing it unless its
+        encoded rows are given
+
+        @type self: FirstMoveTable
+        @type grid: Grid
+        @type rows: List[(array, array)] | None
+           the (starts, moves) of every source, as read by load
+        @rtype: None
+
+        >>> from grid import Grid
+        >>> g = Grid("", ["B.+", "..+", "+.T"])
+        >>> table = FirstMoveTable(g)
+        >>> cells, cost, expanded = table.path(0, 8)
+        >>> cells, cost
+        ([0, 4, 8], 28)
+        """
+        self._grid = grid
+        self.width = grid.width
+        self.height = grid.height
+        self.checksum = zlib.crc32(bytes(grid.terrain))
+        if rows is None:
+            rows = [self._encode(s) for s in range(len(grid.terrain))]
+        self._starts = [starts for starts, _ in rows]
+        self._moves = [moves for _, moves in rows]
+
+    def _encode(self, source):
+        """
+        Compute the run-length encoded row of cell <source>
+
+        @type self: FirstMoveTable
+        @type source: int
+        @rtype: (array, array)
+        """
+        terrain = self._grid.terrain
+        starts = array('I')
+        moves = array('B')
+        if not terrain[source]:
+            return starts, moves
+        width = self.width
+        field = DistanceField(self._grid, source)
+        dist = field.dist
+        step = field.next
+        #the first move towards each cell is the first move towards the cell
+        #before it on its path from source, so fill cells nearest first
+        first = [NO_MOVE] * len(terrain)
+        #a move is told from its change in x and y, as on maps at most two
+        #cells wide different moves can share a change in index
+        moves_by_offset = {offset: k for k, offset in enumerate(NEIGHBOURS)}
+        sx = source % width
+        sy = source // width
+        for i in sorted((i for i in range(len(terrain)) if dist[i] > 0),
+                        key=dist.__getitem__):
+            if step[i] == source:
+                first[i] = moves_by_offset[(i % width - sx, i // width - sy)]
+            else:
+                first[i] = first[step[i]]
+        #islands and the source itself are never looked up, so they take
+        #the move of the run they fall in
+        current = None
+        for i, move in enumerate(first):
+            if i == source or not terrain[i] or move == current:
+                continue
+            starts.append(i if starts else 0)
+            moves.append(move)
+            current = move
+        return starts, moves
+
+    def first_move(self, source, target):
+        """
+        Return the index in NEIGHBOURS of the first move of a shortest path
+        from cell <source> to cell <target>, or NO_MOVE if there is none
+
+        @type self: FirstMoveTable
+        @type source: int
+        @type target: int
+        @rtype: int
+        """
+        starts = self._starts[source]
+        if not starts:
+            return NO_MOVE
+        return self._moves[source][bisect_right(starts, target) - 1]
+
+    def path(self, start, target):
+        """
+        Return (cells, cost, expanded) for a shortest path from cell
+        <start> to cell <target>, as the engines of Grid.find_path do
+
+        expanded is always 0, since the path is read off the table.
+
+        @type self: FirstMoveTable
+        @type start: int
+        @type target: int
+        @rtype: (List[int] | None, int | None, int)
+        """
+        if start == target:
+            return [start], 0, 0
+        if not self._grid.terrain[target]:
+            return None, None, 0
+        width = self.width
+        cells = [start]
+        cost = 0
+        while cells[-1] != target:
+            move = self.first_move(cells[-1], target)
+            if move == NO_MOVE:
+                return None, None, 0
+            dx, dy = NEIGHBOURS[move]
+            cells.append(cells[-1] + dy * width + dx)
+            cost += 14 if dx and dy else 10
+        return cells, cost, 0
+
+    def runs(self):
+        """
+        Return the total number of runs stored, a measure of the table's
+        size
+
+        @type self: FirstMoveTable
+        @rtype: int
+        """
+        return sum(len(starts) for starts in self._starts)
+
+    def save(self, file_path):
+        """
+        Write this table to the file at file_path
+
+        @type self: FirstMoveTable
+        @type file_path: str
+        @rtype: None
+        """
+        with open(file_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.width, self.height,
+                                self.checksum))
+            for starts, moves in zip(self._starts, self._moves):
+                if sys.byteorder == "big":
+                    starts = array('I', starts)
+                    starts.byteswap()
+                f.write(struct.pack("<I", len(starts)))
+                f.write(starts.tobytes())
+                f.write(moves.tobytes())
+
+    @classmethod
+    def load(cls, grid, file_path):
+        """
+        Read the table of <grid> saved at file_path
+
+        Raise ValueError if the file is not a saved table, or was saved for
+        a different map.
+
+        @type cls: type
+        @type grid: Grid
+        @type file_path: str
+        @rtype: FirstMoveTable
+        """
+        with open(file_path, "rb") as f:
+            data = f.read()
+        if len(data) < HEADER.size:
+            raise ValueError("{} is not a first-move table".format(file_path))
+        magic, version, width, height, checksum = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{} is not a first-move table".format(file_path))
+        if (width, height) != (grid.width, grid.height) or \
+                checksum != zlib.crc32(bytes(grid.terrain)):
+            raise ValueError("{} was saved for a different map".format(
+                file_path))
+        rows = []
+        offset = HEADER.size
+        for _ in range(width * height):
+            count = struct.unpack_from("<I", data, offset)[0]
+            offset += 4
+            starts = array('I')
+            starts.frombytes(data[offset:offset + 4 * count])
+            if sys.byteorder == "big":
+                starts.byteswap()
+            offset += 4 * count
+            moves = array('B', data[offset:offset + count])
+            offset += count
+            rows.append((starts, moves))
+        return cls(grid, rows)
+
+
+def first_move_search(grid, start, target, queue="heap"):
+    """
+    Read a shortest path from cell <start> to cell <target> off the
+    FirstMoveTable of <grid>, see Grid.enable_first_moves
+
+    @type grid: Grid
+    @type start: int
+    @type target: int
+    @type queue: str
+       unused, since no search is run
+    @rtype: (List[int] | None, int | None, int)
+    """
+    return grid.first_moves.path(start, target)
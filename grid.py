@@ -8,9 +8,36 @@ Also complete the missing doctests.
 """
 
 import functools
+import io
+import os
 import sys
-import copy
-from container import PriorityQueue
+from search import NEIGHBOURS, octile, open_list
+from search import SearchWorkspace, SparseWorkspace
+from search import DistanceField, label_components, run_length, RunLabels
+from jps import jump_point_search
+from hierarchy import ClusterGraph, hierarchical_search
+from bidirectional import bidirectional_search
+from firstmove import FirstMoveTable, first_move_search
+from landmarks import LandmarkTable
+from anytime import AnytimeSearch
+from dstar import DStarLite
+from ida import ida_search
+import mapfile
+from tiles import TiledTerrain
+from runs import RunTerrain
+
+#translation table mapping map characters to terrain bytes:
+#0 for an island (+), 1 for anything navigable
+TERRAIN_TABLE = bytes(0 if c == ord("+") else 1 for c in range(256))
+#and back from terrain bytes to map characters
+CHAR_TABLE = bytes.maketrans(b"\x00\x01", b"+.")
+#the search engines find_path can use besides its own A*; each is called as
+#engine(grid, start, target, queue) and returns (cells, cost, expanded)
+SEARCH_METHODS = {"jps": jump_point_search, "hpa": hierarchical_search,
+                  "bidirectional": bidirectional_search,
+                  "cpd": first_move_search,
+                  "field": lambda grid, start, target, queue:
+                           grid.field_path(start, target)}
 
 
 @functools.total_ordering
@@ -63,6 +90,9 @@ class Node:
        hcost of the node, as described in the handout
        initially, we set it to the largest possible float
     """
+    __slots__ = ('navigable', 'grid_x', 'grid_y', 'in_path', 'parent',
+                 'gcost', 'hcost')
+
     def __init__(self, navigable, grid_x, grid_y):
         """
         Initialize a new node
@@ -141,6 +171,18 @@ class Node:
         """
         self.parent = parent
 
+    def position(self):
+        """
+        Return the (x, y) coordinates of this node
+
+        @type self: Node
+        @rtype: (int, int)
+
+        >>> Node(True, 2, 3).position()
+        (2, 3)
+        """
+        return (self.grid_x, self.grid_y)
+
     def distance(self, other):
         """
         Compute the distance from self to other
@@ -148,11 +190,8 @@ class Node:
         @other: Node
         @rtype: int
         """
-        dstx = abs(self.grid_x - other.grid_x)
-        dsty = abs(self.grid_y - other.grid_y)
-        if dstx > dsty:
-            return 14 * dsty + 10 * (dstx - dsty)
-        return 14 * dstx + 10 * (dsty - dstx)
+        return octile(abs(self.grid_x - other.grid_x),
+                      abs(self.grid_y - other.grid_y))
 
     def __eq__(self, other):
         """
@@ -165,6 +204,19 @@ class Node:
         return self.grid_x == other.grid_x and self.grid_y == other.grid_y
             
 
+    def __hash__(self):
+        """
+        Return a hash of the coordinates of this node, consistent with
+        __eq__, so nodes can be stored in sets and used as dict keys.
+
+        @type self: Node
+        @rtype: int
+
+        >>> len({Node(True, 1, 2), Node(False, 1, 2)})
+        1
+        """
+        return hash((self.grid_x, self.grid_y))
+
     def __lt__(self, other):
         """
         Return True if self less than other, and false otherwise.
@@ -188,6 +240,141 @@ class Node:
             dot = "+"
         return dot
 
+class PathResult:
+    """
+    The outcome of a path search on a Grid.
+
+    === Attributes: ===
+    @type start: (int, int)
+       the coordinates the search started from
+    @type target: (int, int)
+       the coordinates the search was looking for
+    @type cells: List[(int, int)]
+       the coordinates of the path, from start to target, or an empty
+       list if target cannot be reached
+    @type cost: int | None
+       the length of the path, or None if target cannot be reached
+    @type expanded: int
+       the number of nodes the search expanded
+    @type bound: float | None
+       the path is guaranteed to cost at most bound times the length of a
+       shortest path, or None if the search gives no such guarantee
+    """
+    def __init__(self, start, target, cells, cost, expanded, bound=1):
+        """
+        Initialize a new search result
+
+        @type self: PathResult
+        @type start: (int, int)
+        @type target: (int, int)
+        @type cells: List[(int, int)]
+        @type cost: int | None
+        @type expanded: int
+        @type bound: float | None
+        @rtype: None
+        """
+        self.start = start
+        self.target = target
+        self.cells = cells
+        self.cost = cost
+        self.expanded = expanded
+        self.bound = bound
+
+    def __len__(self):
+        """
+        Return the number of nodes on the path
+
+        @type self: PathResult
+        @rtype: int
+        """
+        return len(self.cells)
+
+    def found(self):
+        """
+        Return True iff the search found a path
+
+        @type self: PathResult
+        @rtype: bool
+        """
+        return self.cost is not None
+
+    def optimal(self):
+        """
+        Return True iff the path is known to be a shortest one
+
+        @type self: PathResult
+        @rtype: bool
+        """
+        return self.bound == 1
+
+    def nodes(self):
+        """
+        Return the Nodes of the path, from start to target, each linked to
+        the previous one as its parent and holding its gcost
+
+        @type self: PathResult
+        @rtype: List[Node]
+
+        >>> r = PathResult((0, 0), (1, 1), [(0, 0), (1, 0), (1, 1)], 20, 2)
+        >>> [(n.position(), n.gcost) for n in r.nodes()]
+        [((0, 0), 0), ((1, 0), 10), ((1, 1), 20)]
+        """
+        lst = []
+        parent = None
+        for x, y in self.cells:
+            node = Node(True, x, y)
+            node.set_hcost(0)
+            if parent is None:
+                node.set_gcost(0)
+            else:
+                node.set_gcost(parent.gcost + parent.distance(node))
+            node.set_parent(parent)
+            node.in_path = True
+            lst.append(node)
+            parent = node
+        return lst
+
+
+class _ColumnView:
+    """
+    A lazy, read-only view of one column of a Grid.
+
+    column[y] creates a new Node for the point (x, y) of the grid.
+    """
+    def __init__(self, grid, x):
+        self._grid = grid
+        self._x = x
+
+    def __len__(self):
+        return self._grid.height
+
+    def __getitem__(self, y):
+        if y < 0:
+            y += self._grid.height
+        if not 0 <= y < self._grid.height:
+            raise IndexError("grid index out of range")
+        return self._grid.node(self._x, y)
+
+
+class _MapView:
+    """
+    A lazy, read-only view of a Grid's terrain as a list of columns, so that
+    map[x][y] is a Node with coordinates (x, y).
+    """
+    def __init__(self, grid):
+        self._grid = grid
+
+    def __len__(self):
+        return self._grid.width
+
+    def __getitem__(self, x):
+        if x < 0:
+            x += self._grid.width
+        if not 0 <= x < self._grid.width:
+            raise IndexError("grid index out of range")
+        return _ColumnView(self._grid, x)
+
+
 class Grid:
     """
     Represents the world where the action of the game takes place.
@@ -202,23 +389,30 @@ class Grid:
        represents the height of the game map in lines
        the y-coordinate runs along height; the topmost
        line contains nodes with y-coordinate 0
-    @type map: List[List[Node]]
+    @type terrain: bytearray | TiledTerrain | RunTerrain
+       terrain[y * width + x] is 1 if the node at (x, y) is navigable
+       and 0 if it is an island; a TiledTerrain for maps opened with a
+       tile cache, and a RunTerrain for compressed maps
+    @type map: _MapView
        map[x][y] is a Node with x-coordinate equal to x
        running from 0 to width-1
        and y-coordinate running from 0 to height-1
+       the Node is created from terrain when it is accessed
     @type treasure: Node
        a navigable node in the map, the location of the treasure
     @type boat: Node
        a navigable node in the map, the current location of the boat
-    @type path: PriorityQueue
-        a closed list of all the daughter Nodes in the A* algorithm
+    @type hierarchy: ClusterGraph | None
+       the abstract graph used by find_path(method="hpa"), or None
 
     === Representation invariants ===
     - width and height are positive integers
     - map has dimensions width, height
+    - terrain has length width * height
     """
 
-    def __init__(self, file_path, text_grid=None):
+    def __init__(self, file_path, text_grid=None, tile_cache=None,
+                 compressed=False):
         """
         If text_grid is None, initialize a new Grid assuming file_path
         contains pathname to a text file with the following format:
@@ -230,6 +424,19 @@ class Grid:
         where a dot indicates a navigable Node, a plus indicates a
         non-navigable Node, B indicates the boat, and T the treasure.
         The width of this grid is 7 and height is 5.
+        file_path may also name a binary map written by mapfile, which
+        open_grid recognizes by its magic bytes.
+        If tile_cache is not None, file_path must name a binary map, which
+        is memory-mapped and paged in by a TiledTerrain keeping at most
+        tile_cache tiles, instead of being read into memory.  Searches on
+        such a grid keep state only for the cells they touch, and the
+        component labels and distance field, which cover the whole map,
+        are not computed.
+        If compressed is True, the terrain is held run-length encoded by a
+        RunTerrain, which takes memory in proportion to the runs of water
+        and islands rather than to the cells; searches then also keep
+        state only for the cells they touch, and the treasure distance
+        field is not computed.
         If text_grid is not None, it should be a list of strings
         representing a Grid. One string element of the list represents
         one row of the Grid. For example the grid above, should be
@@ -243,45 +450,252 @@ class Grid:
              is no need for error handling
            Please call open_grid to open the file
         @type text_grid: List[str]
+        @type tile_cache: int | None
+        @type compressed: bool
         @rtype: None
         """
         self.state = "STARTED"
         self.file_path = file_path
         self.text_grid = text_grid
-        #set up
-        self.path = PriorityQueue(Node.__lt__)
-        #set up map using open_grid() function and then splitting it if it is a file path
-        if self.text_grid == None:
-            self.map = self.open_grid(self.file_path).read().split("\n")
-        #set up map if it is a text grid
+        #stream the rows from the file opened by open_grid, closing it
+        #afterwards, or from the text grid
+        if tile_cache is not None:
+            if compressed:
+                raise ValueError("a tiled map cannot also be compressed")
+            self._load_tiled(TiledTerrain(self.file_path,
+                                          cache_size=tile_cache))
+        elif self.text_grid is None:
+            with self.open_grid(self.file_path) as lines:
+                if isinstance(lines, io.TextIOBase):
+                    self._load(lines, compressed)
+                else:
+                    self._load_binary(lines, compressed)
         else:
-            self.map = self.text_grid
-        #y length of the map
-        self.height = len(self.map)
-        #break up the map into a 2 dimensional list of strings
-        for i in range(len(self.map)):
-            self.map[i] = list(self.map[i])
-        #set width to be the horizontal length of the map
-        self.width = len(self.map[0][:])
-        #find the treasure located in the map
-        g = copy.copy(self.map)
-        for i, x in enumerate(g):
-            if "T" in x:
-                self.treasure = Node(True, x.index("T"),i)
-        #change x and y values
-        self.map  = [list(i) for i in zip(*self.map)]
-        self.boat = self.set_boat()
-        for i,x in enumerate(self.map):
-            for j in range(len(x)):
-                self.map[i][j] = Node(self.map[i][j] != "+",i,j)
-        
+            self._load(self.text_grid, compressed)
+        #map[x][y] creates Nodes from the terrain on demand
+        self.map = _MapView(self)
+        #per-cell search state, allocated by the first search that needs it
+        self._workspaces = {}
+        #the result of the last search, reused by retrace_path
+        self._last_path = None
+        #the connected bodies of water, so unreachable targets are
+        #rejected without a search; a tiled map is too large to label
+        self.components = None
+        self.component_count = None
+        if not self._tiled:
+            self.components, self.component_count = label_components(self)
+        #the abstract graph for hierarchical search, if enabled
+        self.hierarchy = None
+        #the first-move table for search-free queries, if enabled
+        self.first_moves = None
+        #the landmark distances A* uses as its heuristic, if enabled
+        self.landmarks = None
+        #the anytime search of the last anytime_path query, kept so the
+        #next call for the same query can resume it
+        self._anytime = None
+        #the incremental planner of the last incremental_path query
+        self._planner = None
+        #the h-values learned by A* towards _learned_target, by the cells
+        #they were learned for
+        self._learned = None
+        self._learned_target = -1
+        #the distance field towards the treasure, computed by the first
+        #query that needs it
+        self._field = None
+
+    def _load(self, lines, compressed=False):
+        """
+        Read the map from <lines> in a single pass, filling the terrain and
+        finding the boat and the treasure; the terrain is run-length
+        encoded as it is read if compressed is True
+
+        Blank lines end the map.  Raise ValueError if the rows do not all
+        have the same width, or the map has no boat or no treasure.
+
+        @type self: Grid
+        @type lines: Iterable[str]
+           the rows of the map, with or without line endings
+        @type compressed: bool
+        @rtype: None
+
+        >>> Grid("", ["B..", ".+", "..T"])
+        Traceback (most recent call last):
+        ...
+        ValueError: row 1 has width 2, but row 0 has width 3
+        """
+        terrain = None
+        width = None
+        height = 0
+        boat = None
+        treasure = None
+        ended = False
+        for line in lines:
+            row = line.rstrip("\r\n")
+            if not row:
+                ended = True
+                continue
+            if ended:
+                raise ValueError("row {} follows a blank line".format(height))
+            if width is None:
+                width = len(row)
+                terrain = RunTerrain(width) if compressed else bytearray()
+            elif len(row) != width:
+                raise ValueError("row {} has width {}, but row 0 has width "
+                                 "{}".format(height, len(row), width))
+            #store navigability in a flat row-major bytearray, or its
+            #run-length encoding
+            terrain.extend(row.encode().translate(TERRAIN_TABLE))
+            if boat is None and "B" in row:
+                boat = Node(True, row.index("B"), height)
+            if treasure is None and "T" in row:
+                treasure = Node(True, row.index("T"), height)
+            height += 1
+        if boat is None or treasure is None:
+            raise ValueError("the map needs a boat (B) and a treasure (T)")
+        self.width = width
+        self.height = height
+        self.terrain = terrain
+        self.boat = boat
+        self.treasure = treasure
+
+    def _load_binary(self, f, compressed=False):
+        """
+        Read the binary map from the open file <f> with one bulk read,
+        run-length encoding the terrain if compressed is True
+
+        Raise ValueError if the file is not a valid binary map.
+
+        @type self: Grid
+        @type f: BufferedReader
+        @type compressed: bool
+        @rtype: None
+        """
+        width, height, terrain, boat, treasure = mapfile.read_map(f.read())
+        if compressed:
+            terrain = RunTerrain.from_cells(terrain, width)
+        self.width = width
+        self.height = height
+        self.terrain = terrain
+        self.boat = Node(True, *boat)
+        self.treasure = Node(True, *treasure)
+
+    def _load_tiled(self, terrain):
+        """
+        Use the tiled <terrain> of a binary map as this grid's terrain
+
+        @type self: Grid
+        @type terrain: TiledTerrain
+        @rtype: None
+        """
+        self.width = terrain.width
+        self.height = terrain.height
+        self.terrain = terrain
+        self.boat = Node(True, *terrain.boat)
+        self.treasure = Node(True, *terrain.treasure)
+
+    @property
+    def _tiled(self):
+        """
+        Return True iff the terrain is paged in by a TiledTerrain
+
+        @type self: Grid
+        @rtype: bool
+        """
+        return isinstance(self.terrain, TiledTerrain)
+
+    @property
+    def _sparse(self):
+        """
+        Return True iff the terrain is not held one byte per cell, so that
+        arrays over every cell would take far more memory than the terrain
+
+        @type self: Grid
+        @rtype: bool
+        """
+        return not isinstance(self.terrain, bytearray)
+
+    def save_binary(self, file_path):
+        """
+        Write this grid, with its boat and treasure, to file_path as a
+        binary map
+
+        @type self: Grid
+        @type file_path: str
+        @rtype: None
+        """
+        mapfile.write_map(self, file_path)
 
     @classmethod
     def open_grid(self, file_path):
         """
-        @rtype TextIOWrapper: 
+        Open the map at file_path: in binary mode if it starts with the magic
+        bytes of a binary map, and in text mode otherwise
+
+        @type file_path: str
+        @rtype: BufferedReader | TextIOWrapper
         """
-        return open(file_path)
+        f = open(file_path, "rb")
+        if f.peek(len(mapfile.MAGIC))[:len(mapfile.MAGIC)] == mapfile.MAGIC:
+            return f
+        return io.TextIOWrapper(f)
+
+    def is_navigable(self, x, y):
+        """
+        Return True iff (x, y) lies in the map and is navigable
+
+        @type self: Grid
+        @type x: int
+        @type y: int
+        @rtype: bool
+
+        >>> g = Grid("", ["B.++", ".+..", "...T"])
+        >>> g.is_navigable(1, 0), g.is_navigable(2, 0), g.is_navigable(4, 0)
+        (True, False, False)
+        """
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.terrain[y * self.width + x] == 1
+        return False
+
+    def is_segment_navigable(self, x0, x1, y):
+        """
+        Return True iff every point from (x0, y) to (x1, y) lies in the map
+        and is navigable
+
+        This takes one binary search on a compressed map, and a scan in C
+        otherwise, rather than a lookup per point.
+
+        @type self: Grid
+        @type x0: int
+        @type x1: int
+        @type y: int
+        @rtype: bool
+
+        >>> g = Grid("", ["B....+..", "......+T"], compressed=True)
+        >>> g.is_segment_navigable(0, 4, 0), g.is_segment_navigable(2, 6, 0)
+        (True, False)
+        """
+        if x1 < x0:
+            x0, x1 = x1, x0
+        if not (0 <= x0 and x1 < self.width and 0 <= y < self.height):
+            return False
+        first = y * self.width
+        i = first + x0
+        end = first + self.width
+        return (self.terrain[i] == 1 and
+                run_length(self.terrain, i, first, end, 1) > x1 - x0)
+
+    def node(self, x, y):
+        """
+        Return a new Node for the point (x, y) of the map
+
+        Precondition: (x, y) lies in the map
+
+        @type self: Grid
+        @type x: int
+        @type y: int
+        @rtype: Node
+        """
+        return Node(self.terrain[y * self.width + x] == 1, x, y)
     
     def __str__(self):
         """
@@ -296,12 +710,8 @@ class Grid:
         .+..
         ...T
         """
-        #join the 2d list twice, once with nothing and the other with linebreaks
-        lst = []
-        g = self.convert()
-        for i in g:
-            lst.append("".join(i))
-        return"\n".join(lst)
+        #join the rows with linebreaks
+        return "\n".join(self.convert())
 
     def move(self, direction):
         """
@@ -346,31 +756,22 @@ class Grid:
             new = (-1,1)
         else:
             print("Invalid Command")
-            
-        #create a copy of the map so as not to disturb the original 
-        g = copy.copy(self.map)
-        #find the boat's index
-        B = (self.boat.grid_x,self.boat.grid_y)
-        #if the boat (x,y) + the new direction(x,y) is in the bounds of the map
-        if B[0]+new[0] >= 0 and B[0]+new[0] < self.height and B[1]+new[1] >= 0 and B[1]+new[1] < self.width:
-            #if the new position of the boat is navigable
-            if g[B[0]+new[0]][B[1]+new[1]].navigable == True or g[B[0]+new[0]][B[1]+new[1]] == self.treasure:
-                #if the new position is the target position then you win
-                if g[B[0]+new[0]][B[1]+new[1]] == self.treasure:
-                    self.state = "WON"
-                    print(self.state)
-                #move change the map's position to an dot on the old one and B on the new
-                self.boat = g[B[0]+new[0]][B[1]+new[1]]
-                #join the list back together the list we have been working on
-                #set the map equal to the new one set boat  equal to new position
-                self.map = g
-            else:
-                print("Cannot Move here")
+            return
+        #the boat (x,y) + the new direction(x,y)
+        B = (self.boat.grid_x+new[0],self.boat.grid_y+new[1])
+        #if the new position is in the bounds of the map and navigable
+        if self.is_navigable(B[0], B[1]):
+            #if the new position is the target position then you win
+            if self.node(B[0], B[1]) == self.treasure:
+                self.state = "WON"
+                print(self.state)
+            #move the boat to the new position
+            self.boat = self.node(B[0], B[1])
         else:
             print("Cannot Move here")
-        
 
-    def find_path(self, start_node, target_node):
+    def find_path(self, start_node, target_node, queue="heap", method="astar",
+                  epsilon=0):
         """
         Implement the A-star path search algorithm
         If you will add a new node to the path, don't forget to set the parent.
@@ -383,86 +784,679 @@ class Grid:
            The starting node of the path
         @type target_node: Node
            The target node of the path
-        @rtype: None
+        @type queue: str
+           the open list to use: "heap" for an IndexedPriorityQueue, or
+           "bucket" for a BucketQueue, which exploits the small integer
+           fcosts of the grid
+        @type method: str
+           "astar" for this A* search, or the name of another engine in
+           SEARCH_METHODS: "jps" for Jump Point Search, "bidirectional"
+           for A* from both ends at once, "field" for following a
+           distance field towards the target, "hpa" for hierarchical
+           search, which falls back to A* unless enable_hierarchy has
+           been called, or "cpd" for reading the path off the first-move
+           table, which falls back to A* unless enable_first_moves has
+           been called
+        @type epsilon: float
+           if positive, run weighted A*, which inflates the heuristic by
+           1 + epsilon: it expands far fewer nodes, and the path it finds
+           costs at most 1 + epsilon times the optimum.  Weighted fcosts
+           do not grow monotonically, so the "heap" open list is used.
+           Only A* supports this.
+        @rtype: PathResult
+           the path found, which is empty if the target cannot be reached;
+           start_node itself is not modified.  Its bound is 1 + epsilon
+           for A*, 1 for the other exact engines and None for "hpa".
         """
-        #create a copy of the original map
-        g = copy.copy(self.map)
-        #make an open PriorityQueue to store children
-        opens = PriorityQueue(Node.__lt__)
-        #set the starting node's g and h costs to be 0 or else it starts around infinity
-        start_node.gcost = 0
-        start_node.hcost = 0
-        #add the starting node to the open Queue
-        opens.add(start_node)
+        #cells are identified by their index in the terrain
+        start = start_node.grid_y * self.width + start_node.grid_x
+        target = target_node.grid_y * self.width + target_node.grid_x
+        #a target in another body of water cannot be reached
+        if start != target and not self._connected(start, target):
+            return self._make_result(start, target, None, None, 0)
+        #without an abstraction, hierarchical search is plain A*
+        if method == "hpa" and self.hierarchy is None:
+            method = "astar"
+        if method == "cpd" and self.first_moves is None:
+            method = "astar"
+        if epsilon < 0:
+            raise ValueError("epsilon must not be negative")
+        #hand the search to another engine if one was asked for
+        if method != "astar":
+            if method not in SEARCH_METHODS:
+                raise ValueError("unknown search method {!r}".format(method))
+            if epsilon:
+                raise ValueError("epsilon is only supported by A*")
+            cells, cost, expanded = SEARCH_METHODS[method](self, start, target,
+                                                           queue)
+            bound = None if method == "hpa" else 1
+            #a path from hierarchical search need not be a shortest one
+            return self._make_result(start, target, cells, cost, expanded,
+                                     bound, bound == 1)
+        #start a new search in the grid's workspace
+        ws = self.search_workspace()
+        stamp = ws.reset()
+        gcost = ws.gcost
+        parent = ws.parent
+        seen = ws.seen
+        closed = ws.closed
+        terrain = self.terrain
+        width = self.width
+        height = self.height
+        tx = target_node.grid_x
+        ty = target_node.grid_y
+        #make an open list of cells, ordered by their fcost, using the
+        #landmark bound and the learned h-values as the heuristic if there
+        #are any
+        h = self.heuristic(target)
+        if epsilon:
+            #weighted A*: order by g + (1 + epsilon) * h, scaled by 1000 to
+            #keep the keys integers; rounding the weight down keeps the bound
+            weight = int((1 + epsilon) * 1000)
+            fcost = lambda i: 1000 * gcost[i] + weight * h(i)
+            queue = "heap"
+        elif self._learned_target == target and queue == "heap":
+            #learned h-values make many cells tie with the target, so break
+            #ties towards larger gcosts, which lie closer to the target
+            scale = 14 * len(terrain) + 1
+            fcost = lambda i: (gcost[i] + h(i)) * scale - gcost[i]
+        elif self.landmarks is not None or self._learned_target == target:
+            fcost = lambda i: gcost[i] + h(i)
+        else:
+            fcost = lambda i: gcost[i] + octile(abs(i % width - tx),
+                                                abs(i // width - ty))
+        opens = open_list(queue, fcost)
+        seen[start] = stamp
+        gcost[start] = 0
+        parent[start] = -1
+        #add the starting cell to the open Queue
+        opens.add(start)
+        expanded = 0
+        done = []
         #loop while the open set is not empty
         while not opens.is_empty():
-            #remove the value with the lowest fcost built into the PriorityQueue class
+            #remove the cell with the lowest fcost
             q = opens.remove()
-            #create a list of successors
-            suc = []
-            #add each new successor node in the 8 surrounding points to the list if the index is in range and the point is navigable
-            if q.grid_y-1 >= 0 and q.grid_y - 1 < self.height and q.grid_x-1 >= 0 and q.grid_x - 1 < self.width and g[q.grid_x-1][q.grid_y-1].navigable == True:
-                suc.append(Node(g[q.grid_x-1][q.grid_y-1].navigable,q.grid_x-1,q.grid_y-1))
-            if q.grid_y-1 >= 0 and q.grid_y - 1 < self.height and q.grid_x >= 0 and q.grid_x < self.width and g[q.grid_x][q.grid_y-1].navigable == True:
-                suc.append(Node(g[q.grid_x][q.grid_y-1].navigable,q.grid_x,q.grid_y-1))
-            if q.grid_y-1 >= 0 and q.grid_y - 1 < self.height and q.grid_x + 1 >= 0 and q.grid_x + 1 < self.width and g[q.grid_x+1][q.grid_y-1].navigable == True:
-                suc.append(Node(g[q.grid_x+1][q.grid_y-1].navigable,q.grid_x+1,q.grid_y-1))
-            if q.grid_y >= 0 and q.grid_y < self.height and q.grid_x-1 >= 0 and q.grid_x - 1 < self.width and g[q.grid_x-1][q.grid_y].navigable == True:
-                suc.append(Node(g[q.grid_x-1][q.grid_y].navigable,q.grid_x-1,q.grid_y))
-            if q.grid_y >= 0 and q.grid_y < self.height and q.grid_x+1 >= 0 and q.grid_x + 1 < self.width and g[q.grid_x+1][q.grid_y].navigable == True:
-                suc.append(Node(g[q.grid_x+1][q.grid_y].navigable,q.grid_x+1,q.grid_y))
-            if q.grid_y+1 >= 0 and q.grid_y + 1 < self.height and q.grid_x-1 >= 0 and q.grid_x - 1 < self.width and g[q.grid_x-1][q.grid_y+1].navigable == True:
-                suc.append(Node(g[q.grid_x-1][q.grid_y+1].navigable,q.grid_x-1,q.grid_y+1))
-            if q.grid_y+1 >= 0 and q.grid_y + 1 < self.height and q.grid_x >= 0 and q.grid_x < self.width and g[q.grid_x][q.grid_y+1].navigable == True:
-                suc.append(Node(g[q.grid_x][q.grid_y+1].navigable,q.grid_x,q.grid_y+1))
-            if q.grid_y+1 >= 0 and q.grid_y + 1 < self.height and q.grid_x+1 >= 0 and q.grid_x + 1 < self.width and g[q.grid_x+1][q.grid_y+1].navigable == True:
-                suc.append(Node(g[q.grid_x+1][q.grid_y+1].navigable,q.grid_x+1,q.grid_y+1))
-            #for each successor
-            for i in range(len(suc)):
-                #set the parent to be the one that was just removed
-                suc[i].set_parent(q)
-                #stop the search if the target node is found
-                if suc[i] == target_node:
-                    #also add the successor to the closed set
-                    self.path.add(suc[i])
-                    return None
-                #set the target's g, h, and f costs
-                suc[i].set_gcost(q.gcost + q.distance(suc[i]))
-                suc[i].set_hcost(target_node.distance(suc[i]))
-                suc[i].fcost()
-                #if the successor is in the open set and is lower f than the value in the successor then skip the successsor
-                if opens.is_less_than(suc[i]):
-                    pass
-                #if the successor is in the closed set and is lower f than the value in the successor then skip the successsor
-                if self.path.is_less_than(suc[i]):
-                    pass
-                #otherwise add the successor to the open set
+            #stop the search once the target cell is expanded
+            if q == target:
+                if not epsilon:
+                    self._learn(target, gcost[target], gcost, done)
+                return self._path_result(ws, start, target, expanded,
+                                         1 + epsilon)
+            #add the q value to the closed set
+            closed[q] = stamp
+            done.append(q)
+            expanded += 1
+            qx = q % width
+            qy = q // width
+            qg = gcost[q]
+            #visit each of the 8 surrounding points that is in range and
+            #navigable
+            for dx, dy in NEIGHBOURS:
+                x = qx + dx
+                y = qy + dy
+                if not (0 <= x < width and 0 <= y < height):
+                    continue
+                i = y * width + x
+                #skip islands and successors that are already in the closed set
+                if not terrain[i] or closed[i] == stamp:
+                    continue
+                g = qg + (14 if dx and dy else 10)
+                if seen[i] == stamp:
+                    #skip the successor if it was reached by an equal or
+                    #better route
+                    if gcost[i] <= g:
+                        continue
+                    #otherwise requeue it with the better route
+                    gcost[i] = g
+                    parent[i] = q
+                    opens.decrease_key(i)
                 else:
-                    opens.add(suc[i])
-                #add the q value to the closed set
-                self.path.add(q)
-            
+                    seen[i] = stamp
+                    gcost[i] = g
+                    parent[i] = q
+                    opens.add(i)
+        #the target cannot be reached
+        return self._path_result(ws, start, target, expanded, 1 + epsilon)
+
+    def heuristic(self, target):
+        """
+        Return the heuristic A* uses towards cell <target>: a function
+        giving a lower bound on the distance from any cell to target
+
+        This is the landmark bound if enable_landmarks has been called, and
+        the octile distance otherwise, raised to the h-values learned by
+        earlier searches towards target; all of these are consistent.
+
+        @type self: Grid
+        @type target: int
+        @rtype: Callable[[int], int]
+        """
+        if self.landmarks is not None:
+            h = self.landmarks.heuristic(target)
+        else:
+            width = self.width
+            tx = target % width
+            ty = target // width
+            h = lambda i: octile(abs(i % width - tx), abs(i // width - ty))
+        if self._learned_target != target:
+            return h
+        learned = self._learned
+        #reading must not add cells, so only _learn writes to the dict
+        return lambda i: max(learned.get(i, -1), h(i))
+
+    def _learn(self, target, cost, gcost, done):
+        """
+        Learn h-values from an A* search that found a shortest path of
+        length <cost> to cell <target> (Adaptive A*)
+
+        Every cell s the search expanded is at least cost - gcost[s] from
+        target, and these values stay consistent, so later searches towards
+        target can use them as a better informed heuristic.  Values are
+        only learned towards the treasure, which most queries head for, and
+        only for the cells expanded, so a query towards another target
+        neither pays for nor discards them.
+
+        @type self: Grid
+        @type target: int
+        @type cost: int
+        @type gcost: array
+           the gcosts of the search
+        @type done: List[int]
+           the cells the search expanded
+        @rtype: None
+        """
+        if target != self.treasure.grid_y * self.width + self.treasure.grid_x:
+            return
+        if self._learned_target != target:
+            self._learned = {}
+            self._learned_target = target
+        learned = self._learned
+        for s in done:
+            if cost - gcost[s] > learned.get(s, -1):
+                learned[s] = cost - gcost[s]
+
+    def anytime_path(self, start_node, target_node, time_budget=None,
+                     max_expansions=None, epsilon=3.0):
+        """
+        Return a PathResult from start_node to target_node found by an
+        anytime search (ARA*) within time_budget seconds or max_expansions
+        expanded cells
+
+        The search first finds a path within 1 + epsilon of the optimum and
+        then improves it for as long as the budget allows.  Its bound tells
+        how far the path may be from the optimum; a bound of None means no
+        path has been found yet.  Calling this again for the same two
+        nodes resumes the improvement where the last call stopped, so
+        repeated calls converge to a shortest path.
+
+        @type self: Grid
+        @type start_node: Node
+        @type target_node: Node
+        @type time_budget: float | None
+        @type max_expansions: int | None
+        @type epsilon: float
+           the suboptimality allowed in the first iteration
+        @rtype: PathResult
+
+        >>> g = Grid("", ["B...", "+++.", "T..."])
+        >>> result = g.anytime_path(g.boat, g.treasure, max_expansions=1)
+        >>> result.found()
+        False
+        >>> result = g.anytime_path(g.boat, g.treasure)
+        >>> result.cost, result.bound
+        (68, 1)
+        """
+        start = start_node.grid_y * self.width + start_node.grid_x
+        target = target_node.grid_y * self.width + target_node.grid_x
+        if start != target and not self._connected(start, target):
+            return self._make_result(start, target, None, None, 0)
+        search = self._anytime
+        if search is None or (search.start, search.target) != (start, target):
+            search = self._anytime = AnytimeSearch(self, start, target, epsilon)
+        cells, cost, expanded, bound = search.improve(time_budget,
+                                                      max_expansions)
+        #only an optimal path is final; a better one may still be found
+        return self._make_result(start, target, cells, cost, expanded, bound,
+                                 bound == 1)
+
+    def bounded_path(self, start_node, target_node, max_nodes=100000,
+                     max_expansions=None):
+        """
+        Return a PathResult from start_node to target_node found by a
+        memory-bounded search (IDA*), which remembers at most max_nodes
+        cells instead of keeping per-cell arrays for the whole map
+
+        The search expands cells many times over to stay within its memory,
+        and stops early if max_expansions is given.  Its path is a shortest
+        one, and its bound 1, unless it stopped early; the bound is then
+        None, see PathResult.optimal.
+
+        @type self: Grid
+        @type start_node: Node
+        @type target_node: Node
+        @type max_nodes: int
+        @type max_expansions: int | None
+        @rtype: PathResult
+
+        >>> g = Grid("", ["B.++", ".+..", "...T"])
+        >>> result = g.bounded_path(g.boat, g.treasure, max_nodes=4)
+        >>> result.cost, result.optimal()
+        (38, True)
+        """
+        start = start_node.grid_y * self.width + start_node.grid_x
+        target = target_node.grid_y * self.width + target_node.grid_x
+        if start != target and not self._connected(start, target):
+            return self._make_result(start, target, None, None, 0)
+        cells, cost, expanded, optimal = ida_search(self, start, target,
+                                                    max_nodes, max_expansions)
+        return self._make_result(start, target, cells, cost, expanded,
+                                 1 if optimal else None, optimal)
+
+    def incremental_path(self, start_node, target_node):
+        """
+        Return the PathResult of a shortest path from start_node to
+        target_node, repairing the last plan to target_node instead of
+        searching again
+
+        The planner (D* Lite) is kept between calls.  While the target
+        stays the same, moves of the boat and changes made with
+        set_navigable only make it re-expand the cells whose costs they
+        change.
+
+        @type self: Grid
+        @type start_node: Node
+        @type target_node: Node
+        @rtype: PathResult
+
+        >>> g = Grid("", ["B...", "....", "T..."])
+        >>> g.incremental_path(g.boat, g.treasure).cost
+        20
+        >>> g.set_navigable(0, 1, False)
+        >>> g.incremental_path(g.boat, g.treasure).cells
+        [(0, 0), (1, 1), (0, 2)]
+        """
+        start = start_node.grid_y * self.width + start_node.grid_x
+        target = target_node.grid_y * self.width + target_node.grid_x
+        if start != target and not self._connected(start, target):
+            return self._make_result(start, target, None, None, 0)
+        planner = self._planner
+        if planner is None or planner.target != target:
+            planner = self._planner = DStarLite(self, start, target)
+        elif planner.start != start:
+            planner.move_start(start)
+        cells, cost, expanded = planner.plan()
+        return self._make_result(start, target, cells, cost, expanded)
+
+    def set_navigable(self, x, y, navigable):
+        """
+        Turn the point (x, y) into navigable water if navigable is True, or
+        into an island otherwise
+
+        Everything computed from the old terrain is updated: the component
+        labels and the incremental planner are repaired, while the
+        distance field, anytime search and last path are dropped and
+        recomputed when next needed.  Learned h-values stay valid when an
+        island appears, since no path gets shorter, but are dropped when
+        one disappears.  The hierarchy, first-move table and
+        landmark table are dropped too, since rebuilding them is costly;
+        call their enable methods again to rebuild them.
+
+        @type self: Grid
+        @type x: int
+        @type y: int
+        @type navigable: bool
+        @rtype: None
+        """
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise IndexError("({}, {}) is outside the map".format(x, y))
+        i = y * self.width + x
+        value = 1 if navigable else 0
+        if self.terrain[i] == value:
+            return
+        self.terrain[i] = value
+        self._update_components(i)
+        if navigable:
+            self._learned = None
+            self._learned_target = -1
+        if self._planner is not None:
+            self._planner.cells_changed([i])
+        self._last_path = None
+        self._field = None
+        self._anytime = None
+        self.hierarchy = None
+        self.first_moves = None
+        self.landmarks = None
+
+    def _update_components(self, i):
+        """
+        Update the component labels after cell <i> has changed
+
+        Most changes are settled by looking at the 8 cells around i; only
+        changes that may merge or split bodies of water relabel the map.
+
+        @type self: Grid
+        @type i: int
+        @rtype: None
+        """
+        labels = self.components
+        if labels is None:
+            return
+        if isinstance(labels, RunLabels):
+            #labelling the runs of a compressed map takes no longer than
+            #patching them
+            self.components, self.component_count = label_components(self)
+            return
+        qx = i % self.width
+        qy = i // self.width
+        ring = [(qx + dx, qy + dy) for dx, dy in NEIGHBOURS
+                if self.is_navigable(qx + dx, qy + dy)]
+        if self.terrain[i]:
+            found = set(labels[y * self.width + x] for x, y in ring)
+            if len(found) == 1:
+                labels[i] = found.pop()
+                return
+            if not found:
+                labels[i] = self.component_count
+                self.component_count += 1
+                return
+        elif ring:
+            #i cannot have split its body of water if the water around it
+            #is still connected without it
+            labels[i] = -1
+            reached = [ring[0]]
+            left = ring[1:]
+            while reached:
+                x, y = reached.pop()
+                near = [p for p in left
+                        if abs(p[0] - x) <= 1 and abs(p[1] - y) <= 1]
+                left = [p for p in left if p not in near]
+                reached.extend(near)
+            if not left:
+                return
+        self.components, self.component_count = label_components(self)
+
+    def reachable(self, start_node, target_node):
+        """
+        Return True iff the boat can sail from start_node to target_node
+
+        This takes constant time, since it only compares the components
+        of the two nodes, except on a tiled map, which has no component
+        labels, where a path is searched for.
+
+        @type self: Grid
+        @type start_node: Node
+        @type target_node: Node
+        @rtype: bool
+
+        >>> g = Grid("", ["B.+..", "..+.T", "..+.."])
+        >>> g.reachable(g.boat, g.treasure)
+        False
+        """
+        if self.components is None:
+            return self.find_path(start_node, target_node).found()
+        width = self.width
+        return self._connected(start_node.grid_y * width + start_node.grid_x,
+                               target_node.grid_y * width + target_node.grid_x)
+
+    def _connected(self, a, b):
+        """
+        Return True iff cells <a> and <b> are navigable and connected, or,
+        without component labels, if they are navigable
+
+        @type self: Grid
+        @type a: int
+        @type b: int
+        @rtype: bool
+        """
+        if self.components is None:
+            return self.terrain[a] == 1 and self.terrain[b] == 1
+        label = self.components[a]
+        return label != -1 and label == self.components[b]
+
+    def enable_hierarchy(self, cluster_size=16):
+        """
+        Precompute the abstract graph for hierarchical search, with square
+        clusters of cluster_size cells, so that find_path(method="hpa")
+        searches it instead of the whole map
+
+        This is meant to be done once, right after the map is loaded.
+
+        @type self: Grid
+        @type cluster_size: int
+        @rtype: None
+        """
+        self.hierarchy = ClusterGraph(self, cluster_size)
+
+    def disable_hierarchy(self):
+        """
+        Drop the abstract graph, so find_path(method="hpa") is plain A*
+
+        @type self: Grid
+        @rtype: None
+        """
+        self.hierarchy = None
+
+    def enable_first_moves(self, file_path=None):
+        """
+        Load the first-move table of this map from file_path, or compute
+        it if there is no such file, so that find_path(method="cpd") and
+        plot_path answer every query by table lookups
+
+        Computing the table runs one search from every navigable cell, so
+        it is meant to be done offline; if file_path is given, the table
+        computed is saved there for later sessions to load.
+
+        @type self: Grid
+        @type file_path: str | None
+        @rtype: None
+        """
+        if file_path is not None and os.path.exists(file_path):
+            self.first_moves = FirstMoveTable.load(self, file_path)
+            return
+        self.first_moves = FirstMoveTable(self)
+        if file_path is not None:
+            self.first_moves.save(file_path)
+
+    def disable_first_moves(self):
+        """
+        Drop the first-move table, so find_path(method="cpd") is plain A*
+
+        @type self: Grid
+        @rtype: None
+        """
+        self.first_moves = None
+
+    def enable_landmarks(self, k=8, file_path=None):
+        """
+        Load the landmark table of this map from file_path, or compute it
+        with k landmarks if there is no such file, so that find_path's A*
+        uses the landmark (ALT) heuristic
+
+        If file_path is given, the table computed is saved there for later
+        sessions to load.
+
+        @type self: Grid
+        @type k: int
+        @type file_path: str | None
+        @rtype: None
+        """
+        if file_path is not None and os.path.exists(file_path):
+            self.landmarks = LandmarkTable.load(self, file_path)
+            return
+        self.landmarks = LandmarkTable(self, k)
+        if file_path is not None:
+            self.landmarks.save(file_path)
+
+    def disable_landmarks(self):
+        """
+        Drop the landmark table, so find_path's A* uses the octile distance
+
+        @type self: Grid
+        @rtype: None
+        """
+        self.landmarks = None
+
+    def distance_field(self, target_node=None):
+        """
+        Return the DistanceField towards target_node, or towards the
+        treasure if target_node is None
+
+        The field is computed on first use and kept until a field towards
+        another node is asked for, so queries towards the treasure from
+        wherever the boat has moved need no further search.
+
+        @type self: Grid
+        @type target_node: Node | None
+        @rtype: DistanceField
+        """
+        if target_node is None:
+            target_node = self.treasure
+        root = target_node.grid_y * self.width + target_node.grid_x
+        if self._field is None or self._field.root != root:
+            self._field = DistanceField(self, root)
+        return self._field
+
+    def field_path(self, start, target):
+        """
+        Return (cells, cost, expanded) for a shortest path from cell <start>
+        to cell <target>, read off the distance field towards target
+
+        expanded counts the cells expanded to build the field, which is 0
+        if the field was already there.
+
+        @type self: Grid
+        @type start: int
+        @type target: int
+        @rtype: (List[int] | None, int | None, int)
+        """
+        built = self._field is not None and self._field.root == target
+        field = self.distance_field(self.node(target % self.width,
+                                              target // self.width))
+        expanded = 0 if built else field.expanded
+        cells = field.path(start)
+        if cells is None:
+            return None, None, expanded
+        return cells, field.dist[start], expanded
+
+    def search_workspace(self, role="forward"):
+        """
+        Return the workspace searches on this grid share, creating it on
+        first use
+
+        A search that needs several sets of per-cell state at once, such as
+        bidirectional search, asks for one workspace per role.
+
+        @type self: Grid
+        @type role: str
+        @rtype: SearchWorkspace
+        """
+        ws = self._workspaces.get(role)
+        if ws is None or ws.size != len(self.terrain):
+            #arrays over a tiled or compressed map would dwarf its terrain
+            workspace = SparseWorkspace if self._sparse else SearchWorkspace
+            ws = self._workspaces[role] = workspace(len(self.terrain))
+        return ws
+
+    def _path_result(self, ws, start, target, expanded, bound=1):
+        """
+        Return the PathResult of the search from cell <start> to cell
+        <target> that just ran in <ws>, remembering it for retrace_path
+        if it is optimal
+
+        @type self: Grid
+        @type ws: SearchWorkspace
+        @type start: int
+        @type target: int
+        @type expanded: int
+        @type bound: float | None
+        @rtype: PathResult
+        """
+        cells = None
+        cost = None
+        #follow the parents from the target back to the start
+        if ws.seen[target] == ws.generation:
+            cost = ws.gcost[target]
+            cells = []
+            i = target
+            while i != -1:
+                cells.append(i)
+                i = ws.parent[i]
+            cells.reverse()
+        #a path from weighted A* need not be a shortest one
+        return self._make_result(start, target, cells, cost, expanded, bound,
+                                 bound == 1)
+
+    def _make_result(self, start, target, cells, cost, expanded, bound=1,
+                     remember=True):
+        """
+        Return the PathResult of a search from cell <start> to cell
+        <target>, remembering it for retrace_path if remember is True
+
+        @type self: Grid
+        @type start: int
+        @type target: int
+        @type cells: List[int] | None
+           the cells of the path, or None if there is no path
+        @type cost: int | None
+        @type expanded: int
+        @type bound: float | None
+        @type remember: bool
+           False for a search cut short, whose result retrace_path and
+           plot_path should not reuse
+        @rtype: PathResult
+        """
+        width = self.width
+        if cells is None:
+            cells = []
+        result = PathResult((start % width, start // width),
+                            (target % width, target // width),
+                            [(i % width, i // width) for i in cells],
+                            cost, expanded, bound)
+        if remember:
+            self._last_path = result
+        return result
+
+    def path_between(self, start_node, target_node):
+        """
+        Return the PathResult from start_node to target_node, reusing the
+        last search if it was between the same two points; paths are read
+        off the first-move table if it is enabled, and paths to the
+        treasure off the distance field towards it
+
+        @type self: Grid
+        @type start_node: Node
+        @type target_node: Node
+        @rtype: PathResult
+        """
+        last = self._last_path
+        if (last is not None and last.start == start_node.position()
+                and last.target == target_node.position()):
+            return last
+        if self.first_moves is not None:
+            return self.find_path(start_node, target_node, method="cpd")
+        if target_node == self.treasure and not self._sparse:
+            return self.find_path(start_node, target_node, method="field")
+        return self.find_path(start_node, target_node)
+
     def convert(self):
         """converts the map of nodes into a list of strings
         
         @type self: Grid
-        @rtype: list
-        """
-        #create a copy of the map
-        g = copy.copy(self.map)
-        #invert the map back to y and x
-        g = [list(i) for i in zip(*self.map)]
-        #loop for each x y in map set the original value that was given as an input
-        for i,x in enumerate(g):
-            for j in range(len(x)):
-                if g[i][j].navigable and g[i][j] != self.boat and g[i][j] != self.treasure:
-                    g[i][j] = "."
-                elif g[i][j] == self.boat:
-                    g[i][j] = "B"
-                elif g[i][j] == self.treasure:
-                    g[i][j] = "T"
-                else:
-                    g[i][j] = "+"
+        @rtype: List[str]
+        """
+        #read each row of the terrain back into map characters, one slice
+        #at a time so a tiled map is never held in memory whole
+        width = self.width
+        g = []
+        for y in range(self.height):
+            row = self.terrain[y * width:(y + 1) * width]
+            g.append(row.translate(CHAR_TABLE).decode())
+        #mark the treasure and then the boat
+        for node, char in ((self.treasure, "T"), (self.boat, "B")):
+            x = node.grid_x
+            y = node.grid_y
+            g[y] = g[y][:x] + char + g[y][x + 1:]
         return g
 
     def retrace_path(self, start_node, target_node):
@@ -478,42 +1472,13 @@ class Grid:
         @type start_node: Node
         @type target_node: Node
         @rtype: list[Node]
+
+        The cost of this is proportional to the length of the path when
+        find_path has just searched between the same two points.
         """
-        #run the find_path function
-        self.find_path(start_node,target_node)
-        #create an empty list
-        lst = []
-        #copy the closed set
-        nodel = copy.copy(self.path)
-        #add the closed set into a list
-        while not nodel.is_empty():
-            lst.append(nodel.remove())
-        #find the target node in the list
-        for i in range(len(lst)):
-            if lst[i] == target_node:
-                tar = i
-        #create the path from the target to the starting node by adding the all n parents to the list then return it
-        lst2 = []
-        lst2.append(lst[tar])
-        node = lst[tar]
-        while not node == start_node:
-            lst2.append(node)
-            node = node.parent
-        return lst2
-        
-    def set_boat(self):
-        """set the position of the boat
-        @type self: Grid
-        @rtype: Node
-        """
-        #create a copy of the map
-        g = copy.copy(self.map)
-        #search throught the values in the node for the boat
-        for i, x in enumerate(g):
-            if "B" in x:
-                #return a node of the boat
-                return Node(True, i, x.index("B"))
-        
+        #reuse the last search or run the find_path function
+        return self.path_between(start_node, target_node).nodes()
+
     def get_treasure(self, s_range):
         """
         Return treasure node if it is located at a distance s_range or
@@ -521,20 +1486,14 @@ class Grid:
         @type s_range: int
         @rtype: Node, None
         """
-        #make a copy of the map
-        g = copy.copy(self.map)
-        #go through all of g to find the value T and set the treasure at that value = node at that point
-        for i, x in enumerate(g):
-            if "T" in x:
-                Treasure = Node(True, i, x.index("T"))
-        #return the value if it is <= s_range or else don't
-        if self.boat.distance(Treasure) <= s_range:
-            return Treasure
+        #return the treasure if it is <= s_range or else don't
+        if self.boat.distance(self.treasure) <= s_range:
+            return self.treasure
         else:
             return None
 
 
-    def plot_path(self, start_node, target_node):
+    def plot_path(self, start_node, target_node, result=None):
         """
         Return a string representation of the grid map,
         plotting the shortest path from start_node to target_node
@@ -542,6 +1501,10 @@ class Grid:
         @type self: Grid
         @type start_node: Node
         @type target_node: Node
+        @type result: PathResult | None
+           a path already computed between start_node and target_node;
+           if None, the last search between them is reused or find_path
+           is run
         @rtype: str
         >>> g = Grid("", ["B.++", ".+..", "...T"])
         >>> print(g.plot_path(g.boat, g.treasure))
@@ -549,19 +1512,17 @@ class Grid:
         .+*.
         ...T
         """
-        #create a copy of the map
-        g = copy.copy(self.map)
         #make a path using A*
-        paths = self.retrace_path(start_node,target_node)
+        if result is None:
+            result = self.path_between(start_node, target_node)
         #write the path on the grid 
         g = self.convert()
-        for p in paths:
-            if p != start_node and p!= target_node:
-                g[p.grid_y][p.grid_x] = "*"
-        new = []
-        for i, x in enumerate(g):
-            new.append("".join(x))
-        return "\n".join(new)
+        rows = {}
+        for x, y in result.cells[1:-1]:
+            rows.setdefault(y, list(g[y]))[x] = "*"
+        for y, row in rows.items():
+            g[y] = "".join(row)
+        return "\n".join(g)
 
 
 '''if __name__ == '__main__':
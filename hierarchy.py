@@ -0,0 +1,377 @@
+"""This module contains ClusterGraph, the abstract graph Grid uses for
+hierarchical path-finding (HPA*, Botea, Mueller and Schaeffer, 2004).
+
+The map is cut into square clusters.  Transitions are pairs of neighbouring
+navigable cells on either side of a cluster border, and the abstract graph
+links every transition cell to the other transition cells of its cluster,
+at the cost of the shortest route that stays inside the cluster.  A query
+searches this small graph and then refines each abstract edge into cells
+with a search confined to one cluster.
+
+Paths found this way are usually within a few percent of the optimum, but
+are not guaranteed to be shortest.
+"""
+
+from search import NEIGHBOURS, octile, open_list
+
+
+class ClusterGraph:
+    """
+    An abstract graph of the transitions between the clusters of a Grid.
+
+    === Attributes: ===
+    @type cluster_size: int
+       the width and height of a cluster, in cells
+    @type edges: Dict[int, Dict[int, int]]
+       edges[a][b] is the cost of the abstract edge from transition cell a
+       to transition cell b
+
+    === Private Attributes: ===
+    @type _grid: Grid
+       the grid this graph abstracts
+    @type _members: Dict[(int, int), Set[int]]
+       the transition cells of each cluster
+
+    === Representation invariants ===
+    - edges is symmetric: edges[a][b] == edges[b][a]
+    """
+    def __init__(self, grid, cluster_size=16):
+        """
+        Build the abstract graph of <grid>
+
+        @type self: ClusterGraph
+        @type grid: Grid
+        @type cluster_size: int
+        @rtype: None
+        """
+        if cluster_size < 2:
+            raise ValueError("cluster_size must be at least 2")
+        self._grid = grid
+        self.cluster_size = cluster_size
+        self.edges = {}
+        self._members = {}
+        self._add_transitions()
+        #link the transitions inside each cluster
+        for cluster, cells in self._members.items():
+            adjacency = self._adjacency(cluster)
+            for cell in cells:
+                dist = self._confined_search(cell, adjacency, cells)[0]
+                for other in cells:
+                    if other != cell and other in dist:
+                        self.edges[cell][other] = dist[other]
+
+    def cluster(self, cell):
+        """
+        Return the (column, row) of the cluster holding <cell>
+
+        @type self: ClusterGraph
+        @type cell: int
+        @rtype: (int, int)
+        """
+        width = self._grid.width
+        return ((cell % width) // self.cluster_size,
+                (cell // width) // self.cluster_size)
+
+    def _bounds(self, cluster):
+        """
+        Return the (x0, y0, x1, y1) cell bounds of <cluster>, where x1 and
+        y1 are exclusive
+
+        @type self: ClusterGraph
+        @type cluster: (int, int)
+        @rtype: (int, int, int, int)
+        """
+        size = self.cluster_size
+        x0 = cluster[0] * size
+        y0 = cluster[1] * size
+        return (x0, y0, min(x0 + size, self._grid.width),
+                min(y0 + size, self._grid.height))
+
+    def _free(self, x, y):
+        """
+        Return True iff (x, y) lies in the map and is navigable
+
+        @type self: ClusterGraph
+        @type x: int
+        @type y: int
+        @rtype: bool
+        """
+        grid = self._grid
+        return (0 <= x < grid.width and 0 <= y < grid.height
+                and grid.terrain[y * grid.width + x] == 1)
+
+    def _link(self, a, b):
+        """
+        Add the transition between the neighbouring cells (ax, ay) and
+        (bx, by) of two different clusters
+
+        @type self: ClusterGraph
+        @type a: (int, int)
+        @type b: (int, int)
+        @rtype: None
+        """
+        width = self._grid.width
+        i = a[1] * width + a[0]
+        j = b[1] * width + b[0]
+        cost = octile(abs(a[0] - b[0]), abs(a[1] - b[1]))
+        for cell, other in ((i, j), (j, i)):
+            self.edges.setdefault(cell, {})[other] = cost
+            self._members.setdefault(self.cluster(cell), set()).add(cell)
+
+    def _add_border(self, pairs, diagonals):
+        """
+        Add transitions for one border between two clusters
+
+        pairs lists the facing cells of the border in order along it.  Each
+        maximal run of facing cells that are both navigable gets one
+        transition in its middle, or one at each end if it is long.  A
+        diagonal crossing is only added if neither of its cells already
+        faces a navigable cell, since otherwise the straight crossings
+        already connect the same water.
+
+        @type self: ClusterGraph
+        @type pairs: List[((int, int), (int, int))]
+        @type diagonals: List[((int, int), (int, int))]
+        @rtype: None
+        """
+        crossing = set()
+        run = []
+        for a, b in pairs + [(None, None)]:
+            if a is not None and self._free(*a) and self._free(*b):
+                run.append((a, b))
+                crossing.add(a)
+                crossing.add(b)
+                continue
+            if len(run) >= 6:
+                self._link(*run[0])
+                self._link(*run[-1])
+            elif run:
+                self._link(*run[len(run) // 2])
+            run = []
+        for a, b in diagonals:
+            if (self._free(*a) and self._free(*b) and a not in crossing
+                    and b not in crossing):
+                self._link(a, b)
+
+    def _add_transitions(self):
+        """
+        Add the transitions across every cluster border and corner
+
+        @type self: ClusterGraph
+        @rtype: None
+        """
+        width = self._grid.width
+        height = self._grid.height
+        size = self.cluster_size
+        #borders between horizontally neighbouring clusters
+        for bx in range(size, width, size):
+            for y0 in range(0, height, size):
+                ys = range(y0, min(y0 + size, height))
+                pairs = [((bx - 1, y), (bx, y)) for y in ys]
+                diagonals = ([((bx - 1, y), (bx, y + 1)) for y in ys[:-1]] +
+                             [((bx - 1, y + 1), (bx, y)) for y in ys[:-1]])
+                self._add_border(pairs, diagonals)
+        #borders between vertically neighbouring clusters
+        for by in range(size, height, size):
+            for x0 in range(0, width, size):
+                xs = range(x0, min(x0 + size, width))
+                pairs = [((x, by - 1), (x, by)) for x in xs]
+                diagonals = ([((x, by - 1), (x + 1, by)) for x in xs[:-1]] +
+                             [((x + 1, by - 1), (x, by)) for x in xs[:-1]])
+                self._add_border(pairs, diagonals)
+        #diagonal crossings at the corners where four clusters meet
+        for bx in range(size, width, size):
+            for by in range(size, height, size):
+                for a, b in (((bx - 1, by - 1), (bx, by)),
+                             ((bx, by - 1), (bx - 1, by))):
+                    if self._free(*a) and self._free(*b):
+                        self._link(a, b)
+
+    def _adjacency(self, cluster):
+        """
+        Return the navigable cells of <cluster>, each mapped to a list of
+        (neighbour, step cost) pairs for its neighbours inside the cluster
+
+        @type self: ClusterGraph
+        @type cluster: (int, int)
+        @rtype: Dict[int, List[(int, int)]]
+        """
+        width = self._grid.width
+        terrain = self._grid.terrain
+        x0, y0, x1, y1 = self._bounds(cluster)
+        adjacency = {}
+        for qy in range(y0, y1):
+            for qx in range(x0, x1):
+                q = qy * width + qx
+                if not terrain[q]:
+                    continue
+                steps = []
+                for dx, dy in NEIGHBOURS:
+                    x = qx + dx
+                    y = qy + dy
+                    if x0 <= x < x1 and y0 <= y < y1 and terrain[y * width + x]:
+                        steps.append((y * width + x, 14 if dx and dy else 10))
+                adjacency[q] = steps
+        return adjacency
+
+    def _confined_search(self, source, adjacency, goals=None):
+        """
+        Run Dijkstra's algorithm from cell <source> over the cells of one
+        cluster, as given by _adjacency
+
+        Return (dist, parent, expanded), where dist maps every cell reached
+        to its distance from source and parent maps it to the cell it was
+        reached from.  The search stops early once every cell of <goals>
+        has been expanded; the distances of those cells are then final.
+
+        @type self: ClusterGraph
+        @type source: int
+        @type adjacency: Dict[int, List[(int, int)]]
+        @type goals: Collection[int] | None
+        @rtype: (Dict[int, int], Dict[int, int], int)
+        """
+        dist = {source: 0}
+        parent = {source: -1}
+        closed = set()
+        opens = open_list("bucket", dist.__getitem__)
+        opens.add(source)
+        expanded = 0
+        left = len(goals) if goals is not None else -1
+        while not opens.is_empty():
+            q = opens.remove()
+            if goals is not None and q in goals:
+                left -= 1
+                if left == 0:
+                    break
+            closed.add(q)
+            expanded += 1
+            base = dist[q]
+            for i, step in adjacency[q]:
+                if i in closed:
+                    continue
+                g = base + step
+                known = i in dist
+                if known and dist[i] <= g:
+                    continue
+                dist[i] = g
+                parent[i] = q
+                if known:
+                    opens.decrease_key(i)
+                else:
+                    opens.add(i)
+        return dist, parent, expanded
+
+    def search(self, start, target, queue="heap"):
+        """
+        Search for a path from cell <start> to cell <target> on the
+        abstract graph and refine it into cells
+
+        Return (cells, cost, expanded) as the engines of Grid.find_path do.
+
+        @type self: ClusterGraph
+        @type start: int
+        @type target: int
+        @type queue: str
+        @rtype: (List[int] | None, int | None, int)
+
+        >>> from grid import Grid
+        >>> g = Grid("", ["B...+...", "....+...", "....+...", "......T."])
+        >>> graph = ClusterGraph(g, 4)
+        >>> cells, cost, expanded = graph.search(0, 30)
+        >>> cost, len(cells)
+        (72, 7)
+        """
+        if start == target:
+            return [start], 0, 0
+        width = self._grid.width
+        tx = target % width
+        ty = target // width
+        #connect the start and the target to the transitions of their
+        #clusters, and to each other if they share a cluster
+        start_cluster = self.cluster(start)
+        target_cluster = self.cluster(target)
+        dist, _, expanded = self._confined_search(
+            start, self._adjacency(start_cluster))
+        start_edges = {}
+        for cell in self._members.get(start_cluster, ()):
+            if cell in dist:
+                start_edges[cell] = dist[cell]
+        if start_cluster == target_cluster and target in dist:
+            start_edges[target] = dist[target]
+        dist, _, more = self._confined_search(
+            target, self._adjacency(target_cluster))
+        expanded += more
+        to_target = {}
+        for cell in self._members.get(target_cluster, ()):
+            if cell in dist:
+                to_target[cell] = dist[cell]
+        #A* on the abstract graph
+        gcost = {start: 0}
+        parent = {start: -1}
+        closed = set()
+        opens = open_list(queue, lambda i: gcost[i] + octile(
+            abs(i % width - tx), abs(i // width - ty)))
+        opens.add(start)
+        while not opens.is_empty():
+            q = opens.remove()
+            if q == target:
+                break
+            closed.add(q)
+            expanded += 1
+            successors = list(self.edges.get(q, {}).items())
+            if q == start:
+                successors.extend(start_edges.items())
+            if q in to_target:
+                successors.append((target, to_target[q]))
+            for i, cost in successors:
+                if i in closed:
+                    continue
+                g = gcost[q] + cost
+                if i in gcost and gcost[i] <= g:
+                    continue
+                known = i in gcost
+                gcost[i] = g
+                parent[i] = q
+                if known:
+                    opens.decrease_key(i)
+                else:
+                    opens.add(i)
+        if target not in gcost:
+            return None, None, expanded
+        #refine the abstract path into cells
+        points = []
+        i = target
+        while i != -1:
+            points.append(i)
+            i = parent[i]
+        points.reverse()
+        cells = [start]
+        for a, b in zip(points, points[1:]):
+            if self.cluster(a) != self.cluster(b):
+                cells.append(b)
+                continue
+            _, steps, more = self._confined_search(
+                a, self._adjacency(self.cluster(a)), (b,))
+            expanded += more
+            segment = []
+            i = b
+            while i != a:
+                segment.append(i)
+                i = steps[i]
+            segment.reverse()
+            cells.extend(segment)
+        return cells, gcost[target], expanded
+
+
+def hierarchical_search(grid, start, target, queue="heap"):
+    """
+    Search <grid> for a path from cell <start> to cell <target> using its
+    ClusterGraph, see Grid.enable_hierarchy
+
+    @type grid: Grid
+    @type start: int
+    @type target: int
+    @type queue: str
+    @rtype: (List[int] | None, int | None, int)
+    """
+    return grid.hierarchy.search(start, target, queue)
@@ -0,0 +1,202 @@
+"""This module contains a memory-bounded search for the grids of Grid:
+IDA* (Korf, 1985) with a transposition table and controlled re-expansion
+(IDA*_CR; Sarkar et al., 1991).
+
+IDA* runs depth-first searches that cut off every path whose fcost passes
+a threshold, raising the threshold until the target is found.  It stores
+only the current path, so its memory does not grow with the map; the price
+is that cells are expanded again in every iteration.  On a grid, where
+many routes reach each cell at the same cost, plain IDA* would expand the
+same cells over and over, so a transposition table of at most max_nodes
+cells remembers the smallest gcost each cell was reached with and cuts
+off routes that are no better.  The table also keeps, across iterations,
+a lower bound on each cell's distance to the target backed up from its
+neighbours, so dead ends searched once are cut off at once in later
+iterations.  When the table is full, new cells are simply not remembered,
+which costs time but never correctness.  Cells that were only cut off are
+remembered as well, so that when every cell in the table has been expanded
+and none was left out, the search knows target cannot be reached, even on
+a grid without component labels; and no cell is searched at an fcost no
+path could have, so dead ends, whose bounds keep growing, end the search
+even when the table is full.
+
+Raising the threshold to the next fcost cut off would need an iteration
+per fcost value.  Instead, each new threshold is picked so that about as
+many cut-off cells fall under it as were expanded in the last iteration,
+roughly doubling the work per iteration.  The iteration that finds the
+target may then overshoot the optimum, so it keeps searching with the
+cost of the best path found as its bound (depth-first branch and bound),
+which leaves a shortest path.
+"""
+
+from search import NEIGHBOURS
+
+#the fcost of a cell with no successors
+INFINITY = float("inf")
+
+
+def ida_search(grid, start, target, max_nodes=100000, max_expansions=None):
+    """
+    Search <grid> for a shortest path from cell <start> to cell <target>,
+    remembering at most max_nodes cells
+
+    Return a tuple (cells, cost, expanded, optimal), where cells, cost and
+    expanded are as for the engines of Grid.find_path, and optimal is
+    True iff the path is known to be a shortest one, or target is known to
+    be unreachable.  The search gives up after max_expansions expansions,
+    if given; it then returns the best path found so far, if any, which
+    is not known to be optimal.
+
+    @type grid: Grid
+    @type start: int
+    @type target: int
+    @type max_nodes: int
+       the largest number of cells in the transposition table
+    @type max_expansions: int | None
+    @rtype: (List[int] | None, int | None, int, bool)
+
+    >>> from grid import Grid
+    >>> g = Grid("", ["B.....", "......", "+++++.", "T....."])
+    >>> cells, cost, expanded, optimal = ida_search(g, 0, 18, 10)
+    >>> cost, len(cells), optimal
+    (112, 11, True)
+    """
+    width = grid.width
+    height = grid.height
+    terrain = grid.terrain
+    h = grid.heuristic(target)
+    #the transposition table maps a cell to [iteration, gcost, bound,
+    #searched]: the smallest gcost it was reached with in that iteration,
+    #the best lower bound on its distance to target learned so far, and
+    #whether it has ever been expanded; cells that were only cut off are
+    #kept too, so that once every cell in the table has been expanded,
+    #and none had to be left out, the whole body of water has been searched
+    table = {}
+    unexpanded = 0
+    dropped = False
+
+    def lower(i):
+        #the best known lower bound on the distance from i to target
+        entry = table.get(i)
+        return h(i) if entry is None else entry[2]
+
+    def successors(q, g):
+        #the neighbours of q with their gcosts, most promising first
+        qx = q % width
+        qy = q // width
+        steps = []
+        for dx, dy in NEIGHBOURS:
+            x = qx + dx
+            y = qy + dy
+            if 0 <= x < width and 0 <= y < height and terrain[y * width + x]:
+                i = y * width + x
+                steps.append((i, g + (14 if dx and dy else 10)))
+        steps.sort(key=lambda step: step[1] + lower(step[0]))
+        return iter(steps)
+
+    if start == target:
+        return [start], 0, 0, True
+    threshold = h(start)
+    #a path visits each cell at most once, so it costs at most this
+    limit = 14 * len(terrain)
+    expanded = 0
+    iteration = 0
+    while True:
+        iteration += 1
+        entry = table.get(start)
+        if entry is None:
+            table[start] = [iteration, 0, h(start), True]
+        else:
+            entry[0] = iteration
+            entry[1] = 0
+        #how many cells were cut off at each fcost above the threshold
+        cut = {}
+        best = None
+        best_path = None
+        work = 0
+        #the current path, with the gcost, remaining successors and
+        #smallest fcost seen below each of its cells
+        path = [start]
+        on_path = {start}
+        gcosts = [0]
+        steps = [successors(start, 0)]
+        lows = [INFINITY]
+        while path:
+            step = next(steps[-1], None)
+            if step is None:
+                #q is done: its children bound its distance to target
+                q = path.pop()
+                on_path.discard(q)
+                g = gcosts.pop()
+                steps.pop()
+                low = lows.pop()
+                entry = table.get(q)
+                if entry is not None and low - g > entry[2]:
+                    entry[2] = low - g
+                if lows and low < lows[-1]:
+                    lows[-1] = low
+                continue
+            i, g = step
+            f = g + lower(i)
+            entry = table.get(i)
+            if i in on_path or (entry is not None and entry[0] == iteration and
+                                entry[1] <= g):
+                #i closes a cycle, or was reached at least as cheaply before,
+                #so it is neither searched nor counted as cut off
+                lows[-1] = min(lows[-1], f)
+                continue
+            if f > limit or (best is None and f > threshold):
+                #i is cut off; past the limit no path costs this much, so
+                #target is not reached through i, and as the bounds of dead
+                #ends grow past it they are no longer counted as cut off
+                if f <= limit:
+                    cut[f] = cut.get(f, 0) + 1
+                lows[-1] = min(lows[-1], f)
+                if entry is None and len(table) < max_nodes:
+                    table[i] = [0, INFINITY, h(i), False]
+                    unexpanded += 1
+                elif entry is None:
+                    dropped = True
+                continue
+            if best is not None and f >= best:
+                #only paths shorter than the best one are of interest
+                lows[-1] = min(lows[-1], f)
+                continue
+            if entry is not None:
+                entry[0] = iteration
+                entry[1] = g
+            elif len(table) < max_nodes:
+                entry = table[i] = [iteration, g, h(i), False]
+                unexpanded += 1
+            else:
+                dropped = True
+            if i == target:
+                best = g
+                best_path = path + [i]
+                lows[-1] = min(lows[-1], g)
+                continue
+            if max_expansions is not None and expanded >= max_expansions:
+                return best_path, best, expanded, False
+            if entry is not None and not entry[3]:
+                entry[3] = True
+                unexpanded -= 1
+            expanded += 1
+            work += 1
+            path.append(i)
+            on_path.add(i)
+            gcosts.append(g)
+            steps.append(successors(i, g))
+            lows.append(INFINITY)
+        if best is not None:
+            return best_path, best, expanded, True
+        if not cut or not (unexpanded or dropped):
+            #every cell that can be reached has been searched
+            return None, None, expanded, True
+        #raise the threshold past about as many cut-off cells as this
+        #iteration expanded
+        total = 0
+        for f in sorted(cut):
+            total += cut[f]
+            threshold = f
+            if total >= work:
+                break
@@ -0,0 +1,227 @@
+"""This module contains Jump Point Search (Harabor and Grastien, 2011) for
+the 8-connected, uniform-cost grids of Grid.
+
+Instead of queueing every neighbour of every node, JPS jumps along straight
+and diagonal lines and only queues the jump points where a shortest path
+may have to turn, so it expands far fewer nodes than A* on open water
+while returning paths of the same optimal length.  As in Grid.find_path,
+a diagonal step is allowed past the corner of an island.
+
+Long jumps along a row skip whole runs of water at a time: a row jump can
+only stop at the end of its run or where a run ends in a row next to it,
+which search.run_length finds without visiting the cells in between.
+"""
+
+from search import octile, open_list, run_length
+
+#a row jump steps this many cells one at a time before skipping whole runs,
+#which only pays off on long stretches of water
+STEPS = 8
+
+
+def _sign(n):
+    """
+    Return -1, 0 or 1 according to the sign of n
+
+    @type n: int
+    @rtype: int
+    """
+    return (n > 0) - (n < 0)
+
+
+def jump_point_search(grid, start, target, queue="heap"):
+    """
+    Search <grid> for a shortest path from cell <start> to cell <target>
+
+    Return a tuple (cells, cost, expanded), where cells lists every cell of
+    the path from start to target, or is None if target cannot be reached,
+    cost is the length of the path, and expanded is the number of jump
+    points expanded.
+
+    @type grid: Grid
+    @type start: int
+    @type target: int
+    @type queue: str
+       "heap" or "bucket", see search.open_list
+    @rtype: (List[int] | None, int | None, int)
+
+    >>> from grid import Grid
+    >>> g = Grid("", ["B.....", "......", "+++++.", "T....."])
+    >>> cells, cost, expanded = jump_point_search(g, 0, 18)
+    >>> cost, len(cells)
+    (112, 11)
+    """
+    width = grid.width
+    height = grid.height
+    terrain = grid.terrain
+    ws = grid.search_workspace()
+    stamp = ws.reset()
+    gcost = ws.gcost
+    parent = ws.parent
+    seen = ws.seen
+    closed = ws.closed
+    tx = target % width
+    ty = target // width
+
+    def free(x, y):
+        #cells outside the map count as islands
+        return 0 <= x < width and 0 <= y < height and terrain[y * width + x]
+
+    def forced(x, last, y, dx):
+        #the first column from x to last, moving by dx, whose cell in row y
+        #is an island with water past it, or None, stepping over whole runs
+        if not 0 <= y < height:
+            return None
+        first = y * width
+        end = first + width
+        if terrain[first + x]:
+            x += dx * run_length(terrain, first + x, first, end, dx)
+            if not 0 <= x < width:
+                return None
+        x += dx * (run_length(terrain, first + x, first, end, dx) - 1)
+        if not 0 <= x + dx < width or (last - x) * dx < 0:
+            return None
+        return x
+
+    def jump_row(x, y, dx):
+        #jump from (x, y) along the row: step through the first few cells,
+        #then skip whole runs of water
+        for _ in range(STEPS):
+            x += dx
+            if not free(x, y):
+                return None
+            if x == tx and y == ty:
+                return (x, y)
+            if ((not free(x, y + 1) and free(x + dx, y + 1)) or
+                    (not free(x, y - 1) and free(x + dx, y - 1))):
+                return (x, y)
+        first = y * width
+        if not (0 <= x + dx < width and terrain[first + x + dx]):
+            return None
+        last = x + dx * run_length(terrain, first + x + dx, first,
+                                   first + width, dx)
+        stops = [forced(x + dx, last, y - 1, dx),
+                 forced(x + dx, last, y + 1, dx)]
+        if y == ty and (tx - x) * dx > 0 and (last - tx) * dx >= 0:
+            stops.append(tx)
+        stops = [stop for stop in stops if stop is not None]
+        if not stops:
+            return None
+        return (min(stops, key=lambda stop: (stop - x) * dx), y)
+
+    def jump(x, y, dx, dy):
+        #step from (x, y) in direction (dx, dy) until a jump point is found
+        if not dy:
+            return jump_row(x, y, dx)
+        while True:
+            x += dx
+            y += dy
+            if not free(x, y):
+                return None
+            if x == tx and y == ty:
+                return (x, y)
+            if dx and dy:
+                #a diagonal step has forced neighbours behind island corners
+                if ((not free(x - dx, y) and free(x - dx, y + dy)) or
+                        (not free(x, y - dy) and free(x + dx, y - dy))):
+                    return (x, y)
+                #or a straight jump from here leads to a jump point
+                if (jump(x, y, dx, 0) is not None or
+                        jump(x, y, 0, dy) is not None):
+                    return (x, y)
+            else:
+                if ((not free(x + 1, y) and free(x + 1, y + dy)) or
+                        (not free(x - 1, y) and free(x - 1, y + dy))):
+                    return (x, y)
+
+    def directions(x, y, p):
+        #the directions worth jumping in from (x, y), reached from cell p
+        if p == -1:
+            return [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                    if dx or dy]
+        dx = _sign(x - p % width)
+        dy = _sign(y - p // width)
+        if dx and dy:
+            dirs = [(dx, 0), (0, dy), (dx, dy)]
+            if not free(x - dx, y):
+                dirs.append((-dx, dy))
+            if not free(x, y - dy):
+                dirs.append((dx, -dy))
+        elif dx:
+            dirs = [(dx, 0)]
+            if not free(x, y + 1):
+                dirs.append((dx, 1))
+            if not free(x, y - 1):
+                dirs.append((dx, -1))
+        else:
+            dirs = [(0, dy)]
+            if not free(x + 1, y):
+                dirs.append((1, dy))
+            if not free(x - 1, y):
+                dirs.append((-1, dy))
+        return dirs
+
+    opens = open_list(queue, lambda i: gcost[i] + octile(
+        abs(i % width - tx), abs(i // width - ty)))
+    seen[start] = stamp
+    gcost[start] = 0
+    parent[start] = -1
+    opens.add(start)
+    expanded = 0
+    while not opens.is_empty():
+        q = opens.remove()
+        if q == target:
+            return _cells(ws, target, width), gcost[target], expanded
+        closed[q] = stamp
+        expanded += 1
+        x = q % width
+        y = q // width
+        for dx, dy in directions(x, y, parent[q]):
+            point = jump(x, y, dx, dy)
+            if point is None:
+                continue
+            i = point[1] * width + point[0]
+            if closed[i] == stamp:
+                continue
+            g = gcost[q] + octile(abs(point[0] - x), abs(point[1] - y))
+            if seen[i] == stamp:
+                if gcost[i] <= g:
+                    continue
+                gcost[i] = g
+                parent[i] = q
+                opens.decrease_key(i)
+            else:
+                seen[i] = stamp
+                gcost[i] = g
+                parent[i] = q
+                opens.add(i)
+    return None, None, expanded
+
+
+def _cells(ws, target, width):
+    """
+    Return every cell of the path to <target> recorded in <ws>, filling in
+    the straight and diagonal runs between consecutive jump points
+
+    @type ws: SearchWorkspace
+    @type target: int
+    @type width: int
+    @rtype: List[int]
+    """
+    points = []
+    i = target
+    while i != -1:
+        points.append(i)
+        i = ws.parent[i]
+    points.reverse()
+    cells = [points[0]]
+    for a, b in zip(points, points[1:]):
+        x, y = a % width, a // width
+        bx, by = b % width, b // width
+        dx = _sign(bx - x)
+        dy = _sign(by - y)
+        while (x, y) != (bx, by):
+            x += dx
+            y += dy
+            cells.append(y * width + x)
+    return cells
@@ -0,0 +1,187 @@
+"""This module contains LandmarkTable, the ALT heuristic (A*, landmarks and
+the triangle inequality; Goldberg and Harrelson, 2005) for the grids of
+Grid.
+
+A few landmark cells are picked, and the exact distance from each landmark
+to every cell is computed once.  For any landmark L, the triangle
+inequality gives |d(L, t) - d(L, i)| <= d(i, t), so the largest such
+difference over all landmarks is a lower bound on the distance from cell i
+to target t.  On maps full of dead ends this bound is far better informed
+than the octile distance, and A* expands fewer cells with it.
+
+Landmarks are picked far apart: each new landmark is the cell farthest
+from those picked so far.  Computing the table takes one Dijkstra search
+per landmark; it can be saved alongside the map, see LandmarkTable.save
+and LandmarkTable.load.
+"""
+
+from array import array
+import struct
+import sys
+import zlib
+
+from search import octile, DistanceField
+
+#the header of a saved table: magic, version, width, number of cells, terrain
+#checksum and the number of landmarks
+HEADER = struct.Struct("<4sHIIII")
+MAGIC = b"ALT\x00"
+VERSION = 1
+
+
+class LandmarkTable:
+    """
+    Exact distances from a few landmark cells of a Grid to every cell.
+
+    === Attributes: ===
+    @type width: int
+       the width of the grid
+    @type checksum: int
+       the CRC-32 of the grid's terrain, used to match a saved table to
+       its map
+    @type landmarks: List[int]
+       the landmark cells
+    @type dist: List[array]
+       dist[k][i] is the distance between landmarks[k] and cell i, or -1
+       if they are not connected
+
+    === Representation invariants ===
+    - len(dist) == len(landmarks)
+    """
+    def __init__(self, grid, k=8, landmarks=None, dist=None):
+        """
+        Initialize the landmark table of <grid>, picking k landmarks and
+        computing their distances unless both are given
+
+        @type self: LandmarkTable
+        @type grid: Grid
+        @type k: int
+           the number of landmarks to pick
+        @type landmarks: List[int] | None
+        @type dist: List[array] | None
+           the distances of the given landmarks, as read by load
+        @rtype: None
+
+        >>> from grid import Grid
+        >>> g = Grid("", ["B...", "+++.", "T..."])
+        >>> table = LandmarkTable(g, 2)
+        >>> table.landmarks
+        [8, 7]
+        >>> table.heuristic(0)(8)
+        68
+        """
+        self.width = grid.width
+        self.checksum = zlib.crc32(bytes(grid.terrain))
+        if landmarks is not None and dist is not None:
+            self.landmarks = landmarks
+            self.dist = dist
+            return
+        self.landmarks = []
+        self.dist = []
+        terrain = grid.terrain
+        free = [i for i in range(len(terrain)) if terrain[i]]
+        if not free:
+            return
+        #how far each cell is from the nearest landmark so far; cells no
+        #landmark can reach count as farthest, so every body of water
+        #gets one
+        unreached = len(terrain) * 14
+        nearest = DistanceField(grid, free[0]).dist
+        for _ in range(k):
+            landmark = max(free, key=lambda i: nearest[i] if nearest[i] != -1
+                           else unreached)
+            if landmark in self.landmarks:
+                break
+            dist = array('i', DistanceField(grid, landmark).dist)
+            self.landmarks.append(landmark)
+            self.dist.append(dist)
+            nearest = [dist[i] if nearest[i] == -1 else
+                       nearest[i] if dist[i] == -1 else min(nearest[i], dist[i])
+                       for i in range(len(terrain))]
+
+    def heuristic(self, target):
+        """
+        Return a function giving a lower bound on the distance from any
+        cell to cell <target>
+
+        The bound is the largest of the octile distance and the landmark
+        bounds, so it is consistent and never smaller than the octile
+        distance.
+
+        @type self: LandmarkTable
+        @type target: int
+        @rtype: Callable[[int], int]
+        """
+        width = self.width
+        tx = target % width
+        ty = target // width
+        bounds = [(dist, dist[target]) for dist in self.dist
+                  if dist[target] != -1]
+
+        def h(i):
+            best = octile(abs(i % width - tx), abs(i // width - ty))
+            for dist, to_target in bounds:
+                d = dist[i]
+                if d == -1:
+                    continue
+                d = d - to_target if d > to_target else to_target - d
+                if d > best:
+                    best = d
+            return best
+        return h
+
+    def save(self, file_path):
+        """
+        Write this table to the file at file_path
+
+        @type self: LandmarkTable
+        @type file_path: str
+        @rtype: None
+        """
+        size = len(self.dist[0]) if self.dist else 0
+        with open(file_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.width, size,
+                                self.checksum, len(self.landmarks)))
+            f.write(struct.pack("<{}I".format(len(self.landmarks)),
+                                *self.landmarks))
+            for dist in self.dist:
+                if sys.byteorder == "big":
+                    dist = array('i', dist)
+                    dist.byteswap()
+                f.write(dist.tobytes())
+
+    @classmethod
+    def load(cls, grid, file_path):
+        """
+        Read the table of <grid> saved at file_path
+
+        Raise ValueError if the file is not a saved table, or was saved for
+        a different map.
+
+        @type cls: type
+        @type grid: Grid
+        @type file_path: str
+        @rtype: LandmarkTable
+        """
+        with open(file_path, "rb") as f:
+            data = f.read()
+        if len(data) < HEADER.size:
+            raise ValueError("{} is not a landmark table".format(file_path))
+        magic, version, width, size, checksum, k = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{} is not a landmark table".format(file_path))
+        if width != grid.width or checksum != zlib.crc32(bytes(grid.terrain)):
+            raise ValueError("{} was saved for a different map".format(
+                file_path))
+        offset = HEADER.size
+        landmarks = list(struct.unpack_from("<{}I".format(k), data, offset))
+        offset += 4 * k
+        dist = []
+        for _ in range(k):
+            row = array('i')
+            row.frombytes(data[offset:offset + 4 * size])
+            if sys.byteorder == "big":
+                row.byteswap()
+            offset += 4 * size
+            dist.append(row)
+        return cls(grid, k, landmarks, dist)
@@ -0,0 +1,182 @@
+"""This module contains the binary map format read by Grid, and a converter
+from the text format.
+
+A binary map starts with a header holding the magic bytes, the format
+version, the width and height of the map, the positions of the boat and
+the treasure, and a CRC-32 of the rest of the header and the rows.  The
+rows follow, one bit per cell, 1 for navigable, the first cell of a row in
+the highest bit of its first byte; each row is padded to a whole number of
+bytes, so row y starts ROWS + y * row_size(width) bytes into the file.
+
+This takes an eighth of the space of the text format, and is loaded with a
+single bulk read.
+"""
+
+import struct
+import sys
+import zlib
+
+#magic, version, width, height, boat x and y, treasure x and y, checksum
+HEADER = struct.Struct("<4sHIIIIIII")
+MAGIC = b"TMAP"
+VERSION = 1
+#the offset of the first row
+ROWS = HEADER.size
+#translation tables between the characters of a bit string and terrain
+#bytes
+TO_TERRAIN = bytes.maketrans(b"01", b"\x00\x01")
+TO_BITS = bytes.maketrans(b"\x00\x01", b"01")
+
+
+def row_size(width):
+    """
+    Return the number of bytes one row of a map <width> cells wide takes
+
+    @type width: int
+    @rtype: int
+
+    >>> row_size(7), row_size(8), row_size(9)
+    (1, 1, 2)
+    """
+    return (width + 7) // 8
+
+
+def pack(terrain, width, height):
+    """
+    Return the bit-packed rows of <terrain>
+
+    @type terrain: bytearray
+       one byte per cell, 1 for navigable and 0 for an island
+    @type width: int
+    @type height: int
+    @rtype: bytes
+
+    >>> pack(bytearray([1, 0, 1, 1, 0, 0, 0, 0, 1, 1]), 5, 2)
+    b'\\xb0\\x18'
+    """
+    size = row_size(width)
+    pad = b"0" * (size * 8 - width)
+    bits = b"".join(bytes(terrain[y * width:(y + 1) * width]).translate(TO_BITS)
+                    + pad for y in range(height))
+    if not bits:
+        return b""
+    return int(bits, 2).to_bytes(size * height, "big")
+
+
+def unpack(rows, width, height):
+    """
+    Return the terrain packed in <rows>, one byte per cell
+
+    @type rows: bytes | memoryview
+    @type width: int
+    @type height: int
+    @rtype: bytearray
+
+    >>> list(unpack(b'\\xb0\\x18', 5, 2))
+    [1, 0, 1, 1, 0, 0, 0, 0, 1, 1]
+    """
+    size = row_size(width)
+    if not height:
+        return bytearray()
+    #every bit of the file at once, then the padding cut off each row
+    bits = format(int.from_bytes(rows, "big"), "0{}b".format(size * height * 8))
+    bits = bits.encode().translate(TO_TERRAIN)
+    if width == size * 8:
+        return bytearray(bits)
+    stride = size * 8
+    return bytearray(b"".join(bits[y * stride:y * stride + width]
+                              for y in range(height)))
+
+
+def checksum(header, rows):
+    """
+    Return the CRC-32 of a packed <header>, without its checksum, and the
+    packed <rows>
+
+    @type header: bytes | memoryview
+    @type rows: bytes | memoryview
+    @rtype: int
+    """
+    return zlib.crc32(rows, zlib.crc32(header[:HEADER.size - 4]))
+
+
+def read_header(data):
+    """
+    Return (width, height, boat, treasure, checksum) from the header at the
+    start of <data>, where boat and treasure are (x, y) positions
+
+    Raise ValueError if data does not start with the header of a binary map
+    this module can read.
+
+    @type data: bytes | memoryview
+    @rtype: (int, int, (int, int), (int, int), int)
+    """
+    if len(data) < HEADER.size:
+        raise ValueError("not a binary map")
+    magic, version, width, height, bx, by, tx, ty, crc = \
+        HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a binary map")
+    if version != VERSION:
+        raise ValueError("unsupported binary map version {}".format(version))
+    for x, y in ((bx, by), (tx, ty)):
+        if not (x < width and y < height):
+            raise ValueError("({}, {}) is outside the map".format(x, y))
+    return width, height, (bx, by), (tx, ty), crc
+
+
+def read_map(data):
+    """
+    Return (width, height, terrain, boat, treasure) for the binary map in
+    <data>, where boat and treasure are (x, y) positions
+
+    Raise ValueError if data is not a binary map, is truncated or fails its
+    checksum.
+
+    @type data: bytes | memoryview
+    @rtype: (int, int, bytearray, (int, int), (int, int))
+    """
+    data = memoryview(data)
+    width, height, boat, treasure, crc = read_header(data)
+    rows = data[ROWS:ROWS + row_size(width) * height]
+    if len(rows) != row_size(width) * height:
+        raise ValueError("the binary map is truncated")
+    if checksum(data, rows) != crc:
+        raise ValueError("the binary map fails its checksum")
+    return width, height, unpack(rows, width, height), boat, treasure
+
+
+def write_map(grid, file_path):
+    """
+    Write <grid> to file_path as a binary map
+
+    @type grid: Grid
+    @type file_path: str
+    @rtype: None
+    """
+    rows = pack(grid.terrain, grid.width, grid.height)
+    header = HEADER.pack(MAGIC, VERSION, grid.width, grid.height,
+                         grid.boat.grid_x, grid.boat.grid_y,
+                         grid.treasure.grid_x, grid.treasure.grid_y, 0)
+    header = header[:-4] + struct.pack("<I", checksum(header, rows))
+    with open(file_path, "wb") as f:
+        f.write(header)
+        f.write(rows)
+
+
+def convert(text_path, binary_path):
+    """
+    Convert the text map at text_path into a binary map at binary_path
+
+    @type text_path: str
+    @type binary_path: str
+    @rtype: None
+    """
+    from grid import Grid
+    write_map(Grid(text_path), binary_path)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit("usage: python mapfile.py TEXT_MAP BINARY_MAP")
+    convert(sys.argv[1], sys.argv[2])
@@ -0,0 +1,207 @@
+"""This module contains RunTerrain, a run-length encoded terrain for Grid.
+
+Most maps are open water with a few islands, so their terrain is made of a
+few long runs of equal cells.  RunTerrain keeps only the cells where the
+terrain changes between island and water, in one sorted array over the
+whole map, so its memory grows with the number of runs rather than the
+number of cells.  A cell is looked up by binary search, and the length of
+the run holding a cell, which tells at once whether a whole segment of a
+row is navigable, takes a single binary search too.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+from search import WATER
+
+
+class RunTerrain:
+    """
+    The terrain of a Grid, run-length encoded.
+
+    It can be used wherever Grid.terrain is: terrain[i] is 1 if the cell
+    y * width + x is navigable and 0 otherwise, cells can be changed by
+    assigning to terrain[i], and slices give bytes.
+
+    === Attributes: ===
+    @type width: int
+       the number of cells in a row
+
+    === Private Attributes: ===
+    @type _size: int
+       the number of cells
+    @type _edges: array
+       the sorted cells where the terrain changes: cell i is navigable iff
+       an odd number of edges are at most i, so the terrain as a whole
+       begins as an island until the first edge
+
+    >>> t = RunTerrain.from_cells(bytearray([1, 1, 0, 1, 1, 1, 1, 0]), 4)
+    >>> list(t._edges), t[2], t[3], t[4:8]
+    ([0, 2, 3, 7], 0, 1, b'\\x01\\x01\\x01\\x00')
+    """
+    def __init__(self, width):
+        """
+        Initialize an empty terrain with rows of <width> cells
+
+        @type self: RunTerrain
+        @type width: int
+        @rtype: None
+        """
+        self.width = width
+        self._size = 0
+        self._edges = array('I')
+
+    @classmethod
+    def from_cells(cls, cells, width):
+        """
+        Return the run-length encoding of <cells>, one byte per cell with 1
+        for navigable, in rows of <width> cells
+
+        @type cells: bytes | bytearray
+        @type width: int
+        @rtype: RunTerrain
+        """
+        terrain = cls(width)
+        terrain.extend(cells)
+        return terrain
+
+    def extend(self, cells):
+        """
+        Append the cells of one or more rows, one byte per cell with 1 for
+        navigable, to the end of the terrain, as bytearray.extend does
+
+        @type self: RunTerrain
+        @type cells: bytes | bytearray
+        @rtype: None
+        """
+        edges = self._edges
+        size = self._size
+        if size + len(cells) >= 2 ** 32 and edges.typecode == 'I':
+            #positions no longer fit 32 bits
+            self._edges = edges = array('Q', edges)
+        if len(edges) % 2:
+            #close the run reaching the end of the terrain
+            edges.append(size)
+        for match in WATER.finditer(cells):
+            start = size + match.start()
+            if edges and edges[-1] == start:
+                #the run carries on from the one before it
+                edges.pop()
+            else:
+                edges.append(start)
+            edges.append(size + match.end())
+        self._size = size + len(cells)
+
+    def __len__(self):
+        """
+        Return the number of cells
+
+        @type self: RunTerrain
+        @rtype: int
+        """
+        return self._size
+
+    def __getitem__(self, index):
+        """
+        Return 1 if cell <index> is navigable and 0 otherwise, or the bytes
+        of the cells in a slice
+
+        @type self: RunTerrain
+        @type index: int | slice
+        @rtype: int | bytes
+        """
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._size)
+            if step != 1:
+                return bytes(self[i] for i in range(start, stop, step))
+            if stop <= start:
+                return b""
+            #write the runs crossing the slice over an island background
+            cells = bytearray(stop - start)
+            for a, b in self.runs(start, stop):
+                cells[a - start:b - start] = b"\x01" * (b - a)
+            return bytes(cells)
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("terrain index out of range")
+        return bisect_right(self._edges, index) & 1
+
+    def __bytes__(self):
+        """
+        Return the terrain as one byte per cell
+
+        @type self: RunTerrain
+        @rtype: bytes
+        """
+        return self[:]
+
+    def __setitem__(self, index, value):
+        """
+        Make cell <index> navigable if value is 1, or an island if it is 0
+
+        @type self: RunTerrain
+        @type index: int
+        @type value: int
+        @rtype: None
+        """
+        if index < 0:
+            index += self._size
+        if self[index] == (1 if value else 0):
+            return
+        #flipping one cell toggles an edge on each side of it
+        edges = self._edges
+        for edge in (index, index + 1):
+            k = bisect_left(edges, edge)
+            if k < len(edges) and edges[k] == edge:
+                del edges[k]
+            else:
+                edges.insert(k, edge)
+
+    def runs(self, first, end):
+        """
+        Yield (start, stop) for the runs of navigable cells start to
+        stop - 1 that lie in cells first to end - 1, cut to fit
+
+        @type self: RunTerrain
+        @type first: int
+        @type end: int
+        @rtype: Iterator[(int, int)]
+        """
+        edges = self._edges
+        k = bisect_right(edges, first)
+        if k & 1:
+            #first lies in a run that starts before it
+            k -= 1
+        while k < len(edges) and edges[k] < end:
+            stop = edges[k + 1] if k + 1 < len(edges) else self._size
+            yield max(edges[k], first), min(stop, end)
+            k += 2
+
+    def run_length(self, i, first, end, step):
+        """
+        Return the number of cells from cell <i>, going towards end if step
+        is 1 and towards first if it is -1, that are all navigable or all
+        islands, counting only cells first to end - 1
+
+        @type self: RunTerrain
+        @type i: int
+        @type first: int
+        @type end: int
+        @type step: int
+        @rtype: int
+
+        >>> t = RunTerrain.from_cells(bytearray([0, 1, 1, 1, 1, 0]), 6)
+        >>> t.run_length(2, 0, 6, 1), t.run_length(2, 0, 6, -1)
+        (3, 2)
+        >>> t.run_length(2, 0, 3, 1)
+        1
+        """
+        edges = self._edges
+        k = bisect_right(edges, i)
+        if step > 0:
+            stop = edges[k] if k < len(edges) else self._size
+            return min(stop, end) - i
+        start = edges[k - 1] if k > 0 else 0
+        return i - max(start, first) + 1
+
@@ -0,0 +1,462 @@
+"""This module contains the low-level pieces shared by the path search
+engines of Grid: step costs, the octile distance, the per-cell search
+workspace, the open lists, component labels and distance fields.
+
+Cells are identified by their index y * width + x in Grid.terrain.
+"""
+
+from array import array
+from bisect import bisect_right
+from collections import defaultdict
+import re
+
+from container import IndexedPriorityQueue, BucketQueue
+
+#a run of navigable cells in Grid.terrain
+WATER = re.compile(b"\x01+")
+#the (dx, dy) offsets of the 8 nodes surrounding a node
+NEIGHBOURS = [(-1, -1), (0, -1), (1, -1), (-1, 0),
+              (1, 0), (-1, 1), (0, 1), (1, 1)]
+
+
+def octile(dx, dy):
+    """
+    Return the cost of the shortest obstacle-free route covering dx steps
+    horizontally and dy steps vertically, where a straight step costs 10
+    and a diagonal step costs 14
+
+    @type dx: int
+    @type dy: int
+    @rtype: int
+
+    Precondition: dx and dy are non-negative
+
+    >>> octile(2, 3)
+    38
+    """
+    if dx > dy:
+        return 14 * dy + 10 * (dx - dy)
+    return 14 * dx + 10 * (dy - dx)
+
+
+def water_runs(terrain, first, end):
+    """
+    Yield (start, stop) for the runs of navigable cells start to stop - 1
+    that lie in cells first to end - 1 of <terrain>
+
+    @type terrain: bytearray | RunTerrain
+    @type first: int
+    @type end: int
+    @rtype: Iterator[(int, int)]
+
+    >>> list(water_runs(bytearray([1, 1, 0, 1, 0, 1]), 1, 5))
+    [(1, 2), (3, 4)]
+    """
+    if not isinstance(terrain, (bytes, bytearray)):
+        return terrain.runs(first, end)
+    return (match.span() for match in WATER.finditer(terrain, first, end))
+
+
+def run_length(terrain, i, first, end, step):
+    """
+    Return the number of cells from cell <i> of <terrain>, going towards
+    end if step is 1 and towards first if it is -1, that are all navigable
+    or all islands, counting only cells first to end - 1
+
+    This skips a whole run at once, rather than a cell at a time, unless
+    the terrain is tiled.
+
+    @type terrain: bytearray | RunTerrain | TiledTerrain
+    @type i: int
+    @type first: int
+    @type end: int
+    @type step: int
+    @rtype: int
+
+    >>> terrain = bytearray([0, 1, 1, 1, 1, 0])
+    >>> run_length(terrain, 2, 0, 6, 1), run_length(terrain, 2, 0, 6, -1)
+    (3, 2)
+    """
+    if isinstance(terrain, (bytes, bytearray)):
+        other = terrain[i] ^ 1
+        if step > 0:
+            j = terrain.find(other, i, end)
+            return (end if j == -1 else j) - i
+        j = terrain.rfind(other, first, i + 1)
+        return i - (first - 1 if j == -1 else j)
+    if hasattr(terrain, "run_length"):
+        return terrain.run_length(i, first, end, step)
+    value = terrain[i]
+    n = 1
+    while first <= i + n * step < end and terrain[i + n * step] == value:
+        n += 1
+    return n
+
+
+def label_components(grid):
+    """
+    Label the 8-connected bodies of water of <grid>
+
+    Return (labels, count), where labels[i] is the number of the component
+    holding cell i, or -1 if cell i is an island, and count is the number
+    of components.  Two cells are connected iff they have the same label,
+    and components are numbered in the order of their first cell.
+
+    Each row is split into runs of water, and a run joins the components
+    of the runs it touches in the row above, so the work done per cell is
+    small.
+
+    @type grid: Grid
+    @rtype: (array | RunLabels, int)
+       labels is a RunLabels if the terrain is run-length encoded
+
+    >>> from grid import Grid
+    >>> g = Grid("", ["B.+..", "..+.T", "..+.."])
+    >>> labels, count = label_components(g)
+    >>> count, list(labels[:5])
+    (2, [0, 0, -1, 1, 1])
+    """
+    width = grid.width
+    terrain = grid.terrain
+    #a union-find forest over the runs, where each root is its smallest run
+    parent = []
+
+    def find(run):
+        while parent[run] != run:
+            parent[run] = parent[parent[run]]
+            run = parent[run]
+        return run
+
+    #the (first cell, end cell, run) of every run, and the (first column,
+    #end column, run) of the runs in the row above
+    runs = []
+    above = []
+    for y in range(grid.height):
+        offset = y * width
+        row = []
+        j = 0
+        for a, b in water_runs(terrain, offset, offset + width):
+            a -= offset
+            b -= offset
+            run = len(parent)
+            parent.append(run)
+            #runs above touch this one, diagonals included, iff they reach
+            #from column a - 1 to column b
+            while j < len(above) and above[j][1] < a:
+                j += 1
+            k = j
+            while k < len(above) and above[k][0] <= b:
+                root = find(above[k][2])
+                mine = find(run)
+                if root < mine:
+                    parent[mine] = root
+                elif mine < root:
+                    parent[root] = mine
+                k += 1
+            row.append((a, b, run))
+            runs.append((offset + a, offset + b, run))
+        above = row
+    numbers = {}
+    if not isinstance(terrain, (bytes, bytearray)):
+        #keep the labels per run, as the terrain does
+        return RunLabels([(first, end,
+                           numbers.setdefault(find(run), len(numbers)))
+                          for first, end, run in runs]), len(numbers)
+    labels = array('l', [-1]) * len(terrain)
+    for first, end, run in runs:
+        number = numbers.setdefault(find(run), len(numbers))
+        labels[first:end] = array('l', [number]) * (end - first)
+    return labels, len(numbers)
+
+
+class RunLabels:
+    """
+    The component labels of a RunTerrain, kept per run of water: labels[i]
+    is the number of the component holding cell i, or -1 if cell i is an
+    island.
+
+    === Private Attributes: ===
+    @type _starts: array
+       the first cell of each run, in increasing order
+    @type _ends: array
+       the cell after the last cell of each run
+    @type _numbers: array
+       the component of each run
+    """
+    def __init__(self, runs):
+        """
+        Initialize the labels of <runs>, a list of (first cell, end cell,
+        component) in increasing order
+
+        @type self: RunLabels
+        @type runs: List[(int, int, int)]
+        @rtype: None
+        """
+        self._starts = array('Q', [run[0] for run in runs])
+        self._ends = array('Q', [run[1] for run in runs])
+        self._numbers = array('l', [run[2] for run in runs])
+
+    def __getitem__(self, i):
+        """
+        Return the component of cell <i>, or -1 if it is an island
+
+        @type self: RunLabels
+        @type i: int
+        @rtype: int
+
+        >>> labels = RunLabels([(0, 2, 0), (3, 5, 1)])
+        >>> labels[1], labels[2], labels[4]
+        (0, -1, 1)
+        """
+        k = bisect_right(self._starts, i) - 1
+        if k < 0 or i >= self._ends[k]:
+            return -1
+        return self._numbers[k]
+
+
+def identity(item):
+    """
+    Return <item> unchanged, the position of a cell index in a queue
+
+    @type item: object
+    @rtype: object
+    """
+    return item
+
+
+def open_list(queue, key, cells=()):
+    """
+    Return an open list of <cells>, ordered by <key>, built in one pass
+
+    @type queue: str
+       "heap" for an IndexedPriorityQueue, or "bucket" for a BucketQueue,
+       which needs key to return non-negative integers that never decrease
+       below the key of a removed cell
+    @type key: Callable[[int], int]
+    @type cells: Iterable[int]
+    @rtype: IndexedPriorityQueue | BucketQueue
+
+    >>> opens = open_list("bucket", lambda i: 10 - i, [3, 7, 5])
+    >>> opens.pop_many(3)
+    [7, 5, 3]
+    """
+    if queue == "heap":
+        return IndexedPriorityQueue.heapify(cells, None, identity, key=key)
+    if queue == "bucket":
+        return BucketQueue.heapify(cells, key, identity)
+    raise ValueError("unknown queue {!r}".format(queue))
+
+
+class SearchWorkspace:
+    """
+    Preallocated per-cell state for searches on a Grid, indexed like
+    Grid.terrain (y * width + x).
+
+    A cell's entries are only meaningful if its stamp equals the current
+    generation, so reset() clears the whole workspace in O(1) by starting
+    a new generation instead of rewriting every cell.  Cells, gcosts and
+    stamps all fit in 32 bits, so each cell takes 16 bytes.
+
+    === Attributes: ===
+    @type size: int
+       the number of cells
+    @type generation: int
+       the stamp of the current search
+    @type gcost: array
+       gcost[i] is the best known gcost of cell i
+    @type parent: array
+       parent[i] is the cell cell i was reached from, or -1
+    @type seen: array
+       seen[i] == generation iff gcost[i] and parent[i] are set
+    @type closed: array
+       closed[i] == generation iff cell i has been expanded
+    """
+    #the largest stamp an unsigned array entry can hold
+    MAX_GENERATION = 2 ** (8 * array('I').itemsize) - 1
+
+    def __init__(self, size):
+        """
+        Initialize a workspace for <size> cells
+
+        @type self: SearchWorkspace
+        @type size: int
+        @rtype: None
+        """
+        self.size = size
+        self.generation = 0
+        self.gcost = array('i', bytes(array('i').itemsize * size))
+        self.parent = array('i', bytes(array('i').itemsize * size))
+        self.seen = array('I', bytes(array('I').itemsize * size))
+        self.closed = array('I', bytes(array('I').itemsize * size))
+
+    def reset(self):
+        """
+        Forget the previous search and return the new generation
+
+        @type self: SearchWorkspace
+        @rtype: int
+
+        >>> ws = SearchWorkspace(4)
+        >>> ws.reset()
+        1
+        >>> ws.seen[2] = ws.generation
+        >>> ws.reset()
+        2
+        >>> ws.seen[2] == ws.generation
+        False
+        """
+        if self.generation == self.MAX_GENERATION:
+            #the stamps are about to wrap around, so really clear them
+            self.seen = array('I', bytes(self.size * self.seen.itemsize))
+            self.closed = array('I', bytes(self.size * self.closed.itemsize))
+            self.generation = 0
+        self.generation += 1
+        return self.generation
+
+
+class SparseWorkspace:
+    """
+    Per-cell state for searches on a Grid, like SearchWorkspace, but held
+    in dictionaries with entries only for the cells a search touches, for
+    maps too large to allocate arrays over.
+
+    === Attributes: ===
+    @type size: int
+       the number of cells
+    @type generation: int
+       the stamp of the current search
+    @type gcost: Dict[int, int]
+    @type parent: Dict[int, int]
+    @type seen: Dict[int, int]
+       seen[i] == generation iff gcost[i] and parent[i] are set; missing
+       cells read as 0
+    @type closed: Dict[int, int]
+       closed[i] == generation iff cell i has been expanded; missing cells
+       read as 0
+    """
+    def __init__(self, size):
+        """
+        Initialize a workspace for <size> cells
+
+        @type self: SparseWorkspace
+        @type size: int
+        @rtype: None
+        """
+        self.size = size
+        self.generation = 0
+        self.gcost = {}
+        self.parent = {}
+        self.seen = defaultdict(int)
+        self.closed = defaultdict(int)
+
+    def reset(self):
+        """
+        Forget the previous search, freeing its entries, and return the new
+        generation
+
+        @type self: SparseWorkspace
+        @rtype: int
+
+        >>> ws = SparseWorkspace(10 ** 12)
+        >>> ws.reset()
+        1
+        >>> ws.seen[2] = ws.generation
+        >>> ws.reset(), ws.seen[2]
+        (2, 0)
+        """
+        self.gcost.clear()
+        self.parent.clear()
+        self.seen.clear()
+        self.closed.clear()
+        self.generation += 1
+        return self.generation
+
+
+class DistanceField:
+    """
+    The shortest distance from every cell of a Grid to one root cell, with
+    the next step to take from each cell towards the root.
+
+    Steps cost the same in both directions, so this is computed by a
+    single run of Dijkstra's algorithm outwards from the root.
+
+    === Attributes: ===
+    @type root: int
+       the cell the distances are measured to
+    @type dist: array
+       dist[i] is the length of a shortest path from cell i to the root,
+       or -1 if the root cannot be reached from cell i
+    @type next: array
+       next[i] is the neighbour of cell i that is one step closer to the
+       root on a shortest path, or -1 for the root and unreachable cells
+    @type expanded: int
+       the number of cells Dijkstra's algorithm expanded
+    """
+    def __init__(self, grid, root):
+        """
+        Compute the distance field of <grid> towards cell <root>
+
+        @type self: DistanceField
+        @type grid: Grid
+        @type root: int
+        @rtype: None
+
+        >>> from grid import Grid
+        >>> g = Grid("", ["B.+", "..+", "+.T"])
+        >>> field = DistanceField(g, 8)
+        >>> list(field.dist)
+        [28, 24, -1, 24, 14, -1, -1, 10, 0]
+        """
+        width = grid.width
+        height = grid.height
+        terrain = grid.terrain
+        size = len(terrain)
+        self.root = root
+        self.dist = dist = array('l', [-1]) * size
+        self.next = step = array('l', [-1]) * size
+        done = bytearray(size)
+        opens = open_list("bucket", dist.__getitem__)
+        dist[root] = 0
+        opens.add(root)
+        expanded = 0
+        while not opens.is_empty():
+            q = opens.remove()
+            done[q] = 1
+            expanded += 1
+            qx = q % width
+            qy = q // width
+            for dx, dy in NEIGHBOURS:
+                x = qx + dx
+                y = qy + dy
+                if not (0 <= x < width and 0 <= y < height):
+                    continue
+                i = y * width + x
+                if not terrain[i] or done[i]:
+                    continue
+                g = dist[q] + (14 if dx and dy else 10)
+                known = dist[i] != -1
+                if known and dist[i] <= g:
+                    continue
+                dist[i] = g
+                step[i] = q
+                if known:
+                    opens.decrease_key(i)
+                else:
+                    opens.add(i)
+        self.expanded = expanded
+
+    def path(self, start):
+        """
+        Return the cells of a shortest path from cell <start> to the root,
+        or None if the root cannot be reached from start
+
+        @type self: DistanceField
+        @type start: int
+        @rtype: List[int] | None
+        """
+        if self.dist[start] == -1:
+            return None
+        cells = [start]
+        while cells[-1] != self.root:
+            cells.append(self.next[cells[-1]])
+        return cells
@@ -0,0 +1,195 @@
+"""This module contains TiledTerrain, a terrain backend for Grid that pages a
+binary map (see mapfile) in from disk instead of holding it in memory.
+
+The map file is memory-mapped, and read in square tiles of tile_size by
+tile_size cells, each unpacked to one byte per cell when first accessed.
+At most cache_size tiles are kept, the least recently used being dropped
+when another is needed, so the memory used does not grow with the map.
+Searches touch cells close to each other, so most accesses hit a tile
+that is already unpacked.
+"""
+
+import mmap
+from collections import OrderedDict
+
+import mapfile
+
+
+class TiledTerrain:
+    """
+    The terrain of a binary map file, paged in tile by tile.
+
+    It can be used wherever Grid.terrain is: terrain[i] is 1 if the cell
+    y * width + x is navigable and 0 otherwise, cells can be changed by
+    assigning to terrain[i], and slices give bytes.  Changes are kept in
+    memory and never written back to the file.
+
+    === Attributes: ===
+    @type width: int
+    @type height: int
+    @type boat: (int, int)
+       the position of the boat in the map file
+    @type treasure: (int, int)
+       the position of the treasure in the map file
+    @type tile_size: int
+       the width and height of a tile in cells, a multiple of 8
+    @type cache_size: int
+       the largest number of tiles kept unpacked
+    @type loads: int
+       the number of tiles unpacked from the file so far
+
+    === Private Attributes: ===
+    @type _map: mmap
+       the map file, mapped copy-on-write
+    @type _row_size: int
+       the number of bytes a row takes in the file
+    @type _tiles: OrderedDict[(int, int), bytearray]
+       the unpacked tiles by their (column, row), least recently used first
+    """
+    def __init__(self, file_path, tile_size=64, cache_size=256):
+        """
+        Initialize the terrain of the binary map at file_path
+
+        The whole map is not read, so its checksum is not verified.  Raise
+        ValueError if file_path is not a binary map, or tile_size is not a
+        positive multiple of 8, or cache_size is not positive.
+
+        @type self: TiledTerrain
+        @type file_path: str
+        @type tile_size: int
+        @type cache_size: int
+        @rtype: None
+        """
+        if tile_size <= 0 or tile_size % 8:
+            raise ValueError("tile_size must be a positive multiple of 8")
+        if cache_size <= 0:
+            raise ValueError("cache_size must be positive")
+        with open(file_path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        self.width, self.height, self.boat, self.treasure, _ = \
+            mapfile.read_header(self._map)
+        self._row_size = mapfile.row_size(self.width)
+        if len(self._map) < mapfile.ROWS + self._row_size * self.height:
+            raise ValueError("the binary map is truncated")
+        self.tile_size = tile_size
+        self.cache_size = cache_size
+        self.loads = 0
+        self._tiles = OrderedDict()
+
+    def __len__(self):
+        """
+        Return the number of cells
+
+        @type self: TiledTerrain
+        @rtype: int
+        """
+        return self.width * self.height
+
+    def _tile(self, column, row):
+        """
+        Return the unpacked tile at (column, row), reading it from the file
+        if it is not cached
+
+        Cells of the tile outside the map are islands.
+
+        @type self: TiledTerrain
+        @type column: int
+        @type row: int
+        @rtype: bytearray
+        """
+        key = (column, row)
+        tile = self._tiles.get(key)
+        if tile is not None:
+            self._tiles.move_to_end(key)
+            return tile
+        size = self.tile_size
+        step = size // 8
+        chunks = []
+        for y in range(row * size, min((row + 1) * size, self.height)):
+            offset = mapfile.ROWS + y * self._row_size + column * step
+            end = mapfile.ROWS + (y + 1) * self._row_size
+            chunk = self._map[offset:min(offset + step, end)]
+            chunks.append(chunk + bytes(step - len(chunk)))
+        chunks.append(bytes(step * (size - len(chunks))))
+        tile = mapfile.unpack(b"".join(chunks), size, size)
+        self.loads += 1
+        self._tiles[key] = tile
+        if len(self._tiles) > self.cache_size:
+            self._tiles.popitem(last=False)
+        return tile
+
+    def row(self, y):
+        """
+        Return row <y> of the map, one byte per cell, read straight from the
+        file without going through the tile cache
+
+        @type self: TiledTerrain
+        @type y: int
+        @rtype: bytearray
+        """
+        offset = mapfile.ROWS + y * self._row_size
+        return mapfile.unpack(self._map[offset:offset + self._row_size],
+                              self.width, 1)
+
+    def __getitem__(self, index):
+        """
+        Return 1 if cell <index> is navigable and 0 otherwise, or the bytes
+        of the cells in a slice
+
+        @type self: TiledTerrain
+        @type index: int | slice
+        @rtype: int | bytes
+        """
+        width = self.width
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return bytes(self[i] for i in range(start, stop, step))
+            #read whole rows, then cut the slice out of them
+            cells = bytearray()
+            for y in range(start // width, (stop + width - 1) // width):
+                cells += self.row(y)
+            offset = start // width * width
+            return bytes(cells[start - offset:stop - offset])
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("terrain index out of range")
+        y, x = divmod(index, width)
+        size = self.tile_size
+        return self._tile(x // size, y // size)[y % size * size + x % size]
+
+    def __setitem__(self, index, value):
+        """
+        Make cell <index> navigable if value is 1, or an island if it is 0
+
+        @type self: TiledTerrain
+        @type index: int
+        @type value: int
+        @rtype: None
+        """
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("terrain index out of range")
+        y, x = divmod(index, self.width)
+        offset = mapfile.ROWS + y * self._row_size + x // 8
+        bit = 0x80 >> x % 8
+        if value:
+            self._map[offset] |= bit
+        else:
+            self._map[offset] &= ~bit & 0xff
+        size = self.tile_size
+        tile = self._tiles.get((x // size, y // size))
+        if tile is not None:
+            tile[y % size * size + x % size] = 1 if value else 0
+
+    def close(self):
+        """
+        Unmap the map file; the terrain cannot be used afterwards
+
+        @type self: TiledTerrain
+        @rtype: None
+        """
+        self._tiles.clear()
+        self._map.close()
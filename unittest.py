@@ -10,12 +10,17 @@ Please note no unit tests have been provided for TreasureHunt
 (and none will be provided until the assignment is due).
 """
 
+import os
+import random
+import tempfile
 import unittest
 
 
-from container import Container, PriorityQueue
+from container import Container, PriorityQueue, HeapPriorityQueue
+from container import IndexedPriorityQueue, BucketQueue
 from grid import Grid, Node
 from treasurehunt import TreasureHunt
+import mapfile
 
 
 class Helper:
@@ -26,6 +31,17 @@ class Helper:
     def shorter(cls, a, b):
         return len(a) < len(b)
 
+    @classmethod
+    def random_grid(cls, width, height, islands, seed):
+        """Return a random Grid with the boat and treasure in opposite
+        corners and roughly <islands> of its cells covered by islands"""
+        rng = random.Random(seed)
+        rows = [["+" if rng.random() < islands else "." for _ in range(width)]
+                for _ in range(height)]
+        rows[0][0] = "B"
+        rows[-1][-1] = "T"
+        return Grid("", ["".join(row) for row in rows])
+
 
 class TestPriorityQueue(unittest.TestCase):
 
@@ -42,6 +58,28 @@ class TestPriorityQueue(unittest.TestCase):
         msg = "We expected {}, but found {}".format(str(expected), str(actual))
         self.assertEqual(actual, expected, msg)
 
+    def test_pq_add_many(self):
+        queue = PriorityQueue(Helper.shorter)
+        queue.add_many(['fred', 'arju', 'monalisa', 'hat'])
+        actual = queue._queue
+        expected = self.queue._queue
+        msg = "We expected {}, but found {}".format(str(expected), str(actual))
+        self.assertEqual(actual, expected, msg)
+
+    def test_pq_heapify(self):
+        queue = PriorityQueue.heapify(['fred', 'arju', 'monalisa', 'hat'],
+                                      Helper.shorter)
+        actual = queue._queue
+        expected = self.queue._queue
+        msg = "We expected {}, but found {}".format(str(expected), str(actual))
+        self.assertEqual(actual, expected, msg)
+
+    def test_pq_peek_len(self):
+        actual = (self.queue.peek(), len(self.queue))
+        expected = ('hat', 4)
+        msg = "We expected {}, but found {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
     def test_pq_remove(self):
         pq = self.queue._queue
         actual = self.queue.remove()
@@ -50,6 +88,103 @@ class TestPriorityQueue(unittest.TestCase):
         self.assertEqual(actual, expected, msg)
 
 
+class TestHeapPriorityQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.words = ['fred', 'arju', 'monalisa', 'hat', 'pete']
+
+    def drain(self, queue):
+        for word in self.words:
+            queue.add(word)
+        result = []
+        while not queue.is_empty():
+            result.append(queue.remove())
+        return result
+
+    def test_heap_fifo_ties(self):
+        actual = self.drain(HeapPriorityQueue(Helper.shorter))
+        expected = ['hat', 'fred', 'arju', 'pete', 'monalisa']
+        msg = "We expected {}, but found {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+    def test_heap_cached_key(self):
+        actual = self.drain(HeapPriorityQueue(Helper.shorter, key=len))
+        expected = ['hat', 'fred', 'arju', 'pete', 'monalisa']
+        msg = "We expected {}, but found {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+
+    def test_heap_bulk(self):
+        queue = HeapPriorityQueue.heapify(self.words, Helper.shorter)
+        ordered = list(queue)
+        actual = queue.pop_many(3) + queue.pop_many(5)
+        expected = ['hat', 'fred', 'arju', 'pete', 'monalisa']
+        msg = "We expected {}, but found {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+        msg = "Iterating should not remove, expected {}, got {}".format(
+            expected, ordered)
+        self.assertEqual(ordered, expected, msg)
+        self.assertEqual(len(queue), 0)
+
+
+class TestIndexedPriorityQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.queue = IndexedPriorityQueue(Node.__lt__, Node.position,
+                                          key=Node.fcost)
+        self.nodes = [Node(True, i, 0) for i in range(3)]
+        for i, node in enumerate(self.nodes):
+            node.set_gcost(10 * i)
+            node.set_hcost(0)
+            self.queue.add(node)
+
+    def test_indexed_lookup(self):
+        actual = self.queue.get((2, 0))
+        expected = self.nodes[2]
+        msg = "Expected {} at (2, 0), got {}".format(expected, actual)
+        self.assertIs(actual, expected, msg)
+        self.assertFalse((5, 5) in self.queue)
+
+    def test_indexed_decrease_key(self):
+        self.nodes[2].set_gcost(-1)
+        self.queue.decrease_key(self.nodes[2])
+        actual = [self.queue.remove().grid_x for _ in range(3)]
+        expected = [2, 0, 1]
+        msg = "We expected {}, but found {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+        self.assertTrue(self.queue.is_empty())
+
+
+class TestBucketQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.queue = BucketQueue(len, lambda word: word)
+        for word in ['fred', 'arju', 'monalisa', 'hat']:
+            self.queue.add(word)
+
+    def test_bucket_order(self):
+        actual = [self.queue.remove() for _ in range(4)]
+        expected = ['hat', 'fred', 'arju', 'monalisa']
+        msg = "We expected {}, but found {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+        self.assertTrue(self.queue.is_empty())
+
+    def test_bucket_heapify(self):
+        queue = BucketQueue.heapify(['fred', 'arju', 'monalisa', 'hat'], len,
+                                    lambda word: word)
+        actual = queue.pop_many(4)
+        expected = ['hat', 'fred', 'arju', 'monalisa']
+        msg = "We expected {}, but found {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+    def test_bucket_monotone(self):
+        self.queue.remove()
+        self.queue.remove()
+        msg = "Adding below the removed priority should raise ValueError"
+        with self.assertRaises(ValueError, msg=msg):
+            self.queue.add('ab')
+
+
 class TestNode(unittest.TestCase):
 
     def setUp(self):
@@ -68,6 +203,17 @@ class TestNode(unittest.TestCase):
         msg = "Nodes (True, 2, 2) and (True, 2, 2) must be equal"
         self.assertTrue(actual, msg)
 
+    def test_node_slots(self):
+        msg = "Nodes should not carry a __dict__"
+        self.assertFalse(hasattr(self.n1, "__dict__"), msg)
+
+    def test_node_hash(self):
+        actual = len({self.n1, self.n2, self.n3})
+        expected = 2
+        msg = "Expected {} distinct nodes in a set, got {}".format(
+            expected, actual)
+        self.assertEqual(actual, expected, msg)
+
 
 class TestGrid(unittest.TestCase):
     def setUp(self):
@@ -92,6 +238,25 @@ class TestGrid(unittest.TestCase):
         msg = "Expected non-navigable node (4, 6), got {}".format(actual)
         self.assertEqual(actual, expected, msg)
 
+    def test_grid_terrain(self):
+        actual = bytes(self.grid.terrain[7:14])
+        expected = bytes([0, 0, 1, 1, 1, 1, 0])
+        msg = "Expected second row {}, got {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+    def test_grid_map_view(self):
+        actual = [node.navigable for node in self.grid.map[2]]
+        expected = [False, True, True, True, True]
+        msg = "Expected column 2 {}, got {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+    def test_grid_move(self):
+        self.grid.move("E")
+        actual = self.grid.boat
+        expected = Node(True, 4, 1)
+        msg = "Expected boat in (4, 1), got {}".format(actual.position())
+        self.assertEqual(actual, expected, msg)
+
     def test_grid_boat(self):
         actual = self.grid.boat
         expected = Node(True, 3, 1)
@@ -106,6 +271,531 @@ class TestGrid(unittest.TestCase):
         expected = 4
         msg = "Expected path length {}, got {}".format(expected, actual)
         self.assertEqual(actual, expected, msg)
-        
+
+    def test_grid_repeated_search(self):
+        boat = self.grid.boat
+        treasure = self.grid.treasure
+        first = self.grid.retrace_path(boat, treasure)
+        second = self.grid.retrace_path(boat, treasure)
+        msg = "Expected repeated searches to agree, got {} and {}".format(
+            len(first), len(second))
+        self.assertEqual(first, second, msg)
+
+    def test_grid_workspace_reuse(self):
+        boat = self.grid.boat
+        treasure = self.grid.treasure
+        expected = self.grid.find_path(boat, treasure).cells
+        workspace = self.grid.search_workspace()
+        self.grid.find_path(treasure, boat)
+        actual = self.grid.find_path(boat, treasure).cells
+        msg = "Expected repeated path {}, got {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+        msg = "Expected searches to share one workspace"
+        self.assertIs(self.grid.search_workspace(), workspace, msg)
+        self.assertEqual(workspace.generation, 3)
+
+    def test_grid_distance_field(self):
+        grid = Helper.random_grid(30, 20, 0.3, 13)
+        field = grid.distance_field()
+        msg = "Expected the field to be computed once"
+        self.assertIs(grid.distance_field(), field, msg)
+        for x, y in ((0, 0), (12, 7), (29, 0), (5, 19)):
+            if not grid.is_navigable(x, y):
+                continue
+            start = grid.node(x, y)
+            expected = grid.find_path(start, grid.treasure).cost
+            actual = grid.find_path(start, grid.treasure, method="field")
+            msg = "Expected field path cost {} from {}, got {}".format(
+                expected, (x, y), actual.cost)
+            self.assertEqual(actual.cost, expected, msg)
+            msg = "Expected no search for a field path, got {}".format(
+                actual.expanded)
+            self.assertEqual(actual.expanded, 0, msg)
+
+    def test_grid_distance_field_moving_boat(self):
+        field = self.grid.distance_field()
+        treasure = self.grid.treasure
+        self.grid.move("S")
+        expected = self.grid.find_path(self.grid.boat, treasure).cost
+        actual = self.grid.path_between(self.grid.boat, treasure)
+        msg = "Expected path cost {} after moving, got {}".format(
+            expected, actual.cost)
+        self.assertEqual(actual.cost, expected, msg)
+        msg = "Expected the moved boat to reuse the field"
+        self.assertIs(self.grid.distance_field(), field, msg)
+
+    def test_grid_bucket_queue(self):
+        boat = self.grid.boat
+        treasure = self.grid.treasure
+        actual = self.grid.find_path(boat, treasure, queue="bucket").cost
+        expected = self.grid.find_path(boat, treasure).cost
+        msg = "Expected bucket queue path cost {}, got {}".format(
+            expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+    def test_grid_path_result(self):
+        boat = self.grid.boat
+        treasure = self.grid.treasure
+        result = self.grid.find_path(boat, treasure)
+        actual = (result.cost, len(result), result.cells[0], result.cells[-1])
+        expected = (38, 4, (3, 1), (1, 4))
+        msg = "Expected path result {}, got {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+        msg = "retrace_path should reuse the result of find_path"
+        self.assertIs(self.grid.path_between(boat, treasure), result, msg)
+
+    def test_grid_jps(self):
+        for seed in range(20):
+            grid = Helper.random_grid(30, 20, 0.3, seed)
+            expected = grid.find_path(grid.boat, grid.treasure).cost
+            result = grid.find_path(grid.boat, grid.treasure, method="jps")
+            msg = "Seed {}: expected JPS cost {}, got {}".format(
+                seed, expected, result.cost)
+            self.assertEqual(result.cost, expected, msg)
+            steps = [p.distance(q) for p, q in zip(result.nodes(),
+                                                   result.nodes()[1:])]
+            msg = "Seed {}: expected unit steps, got {}".format(seed, steps)
+            self.assertTrue(set(steps) <= {10, 14}, msg)
+
+    def test_grid_bidirectional(self):
+        for seed in range(20):
+            grid = Helper.random_grid(30, 20, 0.35, seed)
+            expected = grid.find_path(grid.boat, grid.treasure).cost
+            result = grid.find_path(grid.boat, grid.treasure,
+                                    method="bidirectional")
+            msg = "Seed {}: expected bidirectional cost {}, got {}".format(
+                seed, expected, result.cost)
+            self.assertEqual(result.cost, expected, msg)
+            if result.found():
+                self.assertEqual(result.cells[0], grid.boat.position())
+                self.assertEqual(result.cells[-1], grid.treasure.position())
+
+    def test_grid_hpa(self):
+        for seed in range(10):
+            grid = Helper.random_grid(30, 20, 0.3, seed)
+            fallback = grid.find_path(grid.boat, grid.treasure, method="hpa")
+            optimal = grid.find_path(grid.boat, grid.treasure)
+            msg = "Seed {}: without clusters hpa should be A*".format(seed)
+            self.assertEqual(fallback.cost, optimal.cost, msg)
+            grid.enable_hierarchy(5)
+            result = grid.find_path(grid.boat, grid.treasure, method="hpa")
+            msg = "Seed {}: expected a path iff A* finds one".format(seed)
+            self.assertEqual(result.found(), optimal.found(), msg)
+            if optimal.found():
+                msg = "Seed {}: hpa cost {} below optimum {}".format(
+                    seed, result.cost, optimal.cost)
+                self.assertTrue(result.cost >= optimal.cost, msg)
+            actual = grid.path_between(grid.boat, grid.treasure).cost
+            msg = "Seed {}: expected no hpa path to be reused, got cost {}"
+            self.assertEqual(actual, optimal.cost, msg.format(seed, actual))
+
+    def test_grid_first_moves(self):
+        rng = random.Random(4)
+        for seed in range(3):
+            grid = Helper.random_grid(12, 9, 0.3, seed)
+            grid.enable_first_moves()
+            for _ in range(20):
+                start = grid.node(rng.randrange(12), rng.randrange(9))
+                target = grid.node(rng.randrange(12), rng.randrange(9))
+                if not (start.navigable and target.navigable):
+                    continue
+                expected = grid.find_path(start, target).cost
+                actual = grid.find_path(start, target, method="cpd")
+                msg = "Seed {}: expected cpd cost {} from {} to {}, got {}"
+                msg = msg.format(seed, expected, start.position(),
+                                 target.position(), actual.cost)
+                self.assertEqual(actual.cost, expected, msg)
+                msg = "Seed {}: expected no search for a cpd path".format(seed)
+                self.assertEqual(actual.expanded, 0, msg)
+        #on a map two cells wide, different moves share a change in index
+        grid = Grid("", ["B.", ".+", "..", ".T"])
+        grid.enable_first_moves()
+        start = grid.node(1, 2)
+        target = grid.node(1, 0)
+        expected = grid.find_path(start, target).cost
+        actual = grid.find_path(start, target, method="cpd").cost
+        msg = "Expected cpd cost {} on a narrow map, got {}".format(
+            expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+    def test_grid_first_moves_file(self):
+        with tempfile.TemporaryDirectory() as folder:
+            file_path = os.path.join(folder, "grid.fmt")
+            self.grid.enable_first_moves(file_path)
+            expected = self.grid.plot_path(self.grid.boat, self.grid.treasure)
+            grid = Grid("", self.data)
+            grid.enable_first_moves(file_path)
+            actual = grid.plot_path(grid.boat, grid.treasure)
+            other = Grid("", ["B.", ".T"])
+            msg = "Expected a table saved for another map to be rejected"
+            with self.assertRaises(ValueError, msg=msg):
+                other.enable_first_moves(file_path)
+        msg = "Expected plot from the saved table\n{}\ngot\n{}".format(
+            expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+    def test_grid_landmarks(self):
+        plain = 0
+        alt = 0
+        for seed in range(5):
+            #a fresh grid for each search, so no h-values learned by an
+            #earlier one are measured instead of the landmarks
+            grid = Helper.random_grid(30, 20, 0.35, seed)
+            optimal = grid.find_path(grid.boat, grid.treasure)
+            for queue in ("heap", "bucket"):
+                grid = Helper.random_grid(30, 20, 0.35, seed)
+                grid.enable_landmarks(4)
+                result = grid.find_path(grid.boat, grid.treasure, queue=queue)
+                msg = "Seed {}: expected landmark cost {}, got {}".format(
+                    seed, optimal.cost, result.cost)
+                self.assertEqual(result.cost, optimal.cost, msg)
+            plain += optimal.expanded
+            alt += result.expanded
+        msg = "Expected landmarks to expand at most {} cells, got {}".format(
+            plain, alt)
+        self.assertTrue(alt <= plain, msg)
+
+    def test_grid_landmarks_file(self):
+        with tempfile.TemporaryDirectory() as folder:
+            file_path = os.path.join(folder, "grid.alt")
+            self.grid.enable_landmarks(3, file_path)
+            expected = self.grid.landmarks.dist
+            grid = Grid("", self.data)
+            grid.enable_landmarks(3, file_path)
+            actual = grid.landmarks.dist
+        msg = "Expected saved landmark distances {}, got {}".format(
+            expected, actual)
+        self.assertEqual(actual, expected, msg)
+
+    def test_grid_weighted(self):
+        plain = 0
+        weighted = 0
+        for seed in range(10):
+            grid = Helper.random_grid(40, 30, 0.25, seed)
+            optimal = grid.find_path(grid.boat, grid.treasure)
+            for epsilon in (0.2, 1):
+                result = grid.find_path(grid.boat, grid.treasure,
+                                        epsilon=epsilon)
+                msg = "Seed {}: expected bound {}, got {}".format(
+                    seed, 1 + epsilon, result.bound)
+                self.assertEqual(result.bound, 1 + epsilon, msg)
+                msg = "Seed {}: expected a path iff A* finds one".format(seed)
+                self.assertEqual(result.found(), optimal.found(), msg)
+                if optimal.found():
+                    msg = "Seed {}: cost {} exceeds {} times the optimum {}"
+                    msg = msg.format(seed, result.cost, result.bound,
+                                     optimal.cost)
+                    self.assertTrue(
+                        result.cost <= result.bound * optimal.cost, msg)
+                actual = grid.path_between(grid.boat, grid.treasure).cost
+                msg = "Seed {}: expected the optimal cost {} to be kept, got {}"
+                self.assertEqual(actual, optimal.cost,
+                                 msg.format(seed, optimal.cost, actual))
+            plain += optimal.expanded
+            weighted += result.expanded
+        msg = "Expected weighted A* to expand fewer than {} cells, got {}"
+        msg = msg.format(plain, weighted)
+        self.assertTrue(weighted < plain, msg)
+        msg = "Expected epsilon to be rejected by other engines"
+        with self.assertRaises(ValueError, msg=msg):
+            self.grid.find_path(self.grid.boat, self.grid.treasure,
+                                method="jps", epsilon=0.5)
+
+    def test_grid_anytime(self):
+        for seed in range(5):
+            grid = Helper.random_grid(30, 20, 0.25, seed)
+            optimal = grid.find_path(grid.boat, grid.treasure)
+            if not optimal.found():
+                continue
+            result = grid.anytime_path(grid.boat, grid.treasure,
+                                       max_expansions=30)
+            expanded = result.expanded
+            while result.bound != 1:
+                if result.found():
+                    msg = "Seed {}: cost {} exceeds {} times the optimum {}"
+                    msg = msg.format(seed, result.cost, result.bound,
+                                     optimal.cost)
+                    self.assertTrue(
+                        result.cost <= result.bound * optimal.cost, msg)
+                result = grid.anytime_path(grid.boat, grid.treasure,
+                                           max_expansions=30)
+                msg = "Seed {}: expected the search to resume".format(seed)
+                self.assertTrue(result.expanded >= expanded, msg)
+                expanded = result.expanded
+            msg = "Seed {}: expected anytime cost {} to converge to {}".format(
+                seed, result.cost, optimal.cost)
+            self.assertEqual(result.cost, optimal.cost, msg)
+
+    def test_grid_anytime_deadline(self):
+        grid = Helper.random_grid(60, 60, 0.2, 3)
+        result = grid.anytime_path(grid.boat, grid.treasure, time_budget=0)
+        msg = "Expected nothing expanded with no time, got {}".format(
+            result.expanded)
+        self.assertEqual(result.expanded, 0, msg)
+        msg = "Expected no path and no bound with no time"
+        self.assertFalse(result.found(), msg)
+        self.assertIsNone(result.bound, msg)
+        msg = "Expected retrace_path to search again after a search cut short"
+        self.assertTrue(grid.retrace_path(grid.boat, grid.treasure), msg)
+
+    def test_grid_set_navigable(self):
+        grid = Grid("", ["B.+..", "....T", "..+.."])
+        grid.enable_landmarks(2)
+        grid.find_path(grid.boat, grid.treasure)
+        grid.set_navigable(2, 1, False)
+        msg = "Expected the sealed treasure to be unreachable"
+        self.assertFalse(grid.reachable(grid.boat, grid.treasure), msg)
+        msg = "Expected terrain-derived tables to be dropped"
+        self.assertIsNone(grid.landmarks, msg)
+        actual = grid.retrace_path(grid.boat, grid.treasure)
+        msg = "Expected no path after sealing the treasure, got {}".format(
+            actual)
+        self.assertEqual(actual, [], msg)
+        grid.set_navigable(2, 0, True)
+        actual = grid.find_path(grid.boat, grid.treasure).cost
+        msg = "Expected cost 44 after opening a gap, got {}".format(actual)
+        self.assertEqual(actual, 44, msg)
+
+    def test_grid_incremental(self):
+        rng = random.Random(8)
+        grid = Helper.random_grid(30, 20, 0.2, 8)
+        replanned = 0
+        searched = 0
+        for _ in range(30):
+            x = rng.randrange(1, 29)
+            y = rng.randrange(1, 19)
+            grid.set_navigable(x, y, not grid.is_navigable(x, y))
+            result = grid.incremental_path(grid.boat, grid.treasure)
+            optimal = grid.find_path(grid.boat, grid.treasure)
+            msg = "Expected replanned cost {}, got {}".format(
+                optimal.cost, result.cost)
+            self.assertEqual(result.cost, optimal.cost, msg)
+            replanned += result.expanded
+            searched += optimal.expanded
+        msg = "Expected replanning to expand fewer than {} cells, got {}"
+        msg = msg.format(searched, replanned)
+        self.assertTrue(replanned < searched, msg)
+
+    def test_grid_adaptive(self):
+        grid = Helper.random_grid(40, 30, 0.25, 1)
+        path = grid.find_path(grid.boat, grid.treasure).cells
+        learned = 0
+        plain = 0
+        for x, y in path[:-1:5]:
+            result = grid.find_path(grid.node(x, y), grid.treasure)
+            fresh = Helper.random_grid(40, 30, 0.25, 1)
+            expected = fresh.find_path(fresh.node(x, y), fresh.treasure)
+            msg = "Expected learned cost {} from {}, got {}".format(
+                expected.cost, (x, y), result.cost)
+            self.assertEqual(result.cost, expected.cost, msg)
+            learned += result.expanded
+            plain += expected.expanded
+        msg = "Expected learning to expand fewer than {} cells, got {}".format(
+            plain, learned)
+        self.assertTrue(learned < plain, msg)
+
+    def test_grid_adaptive_terrain(self):
+        grid = Grid("", ["B.+.T", "..+..", "..+..", "....."])
+        grid.find_path(grid.boat, grid.treasure)
+        grid.set_navigable(2, 0, True)
+        actual = grid.find_path(grid.boat, grid.treasure).cost
+        msg = "Expected cost 40 after opening a gap, got {}".format(actual)
+        self.assertEqual(actual, 40, msg)
+
+    def test_grid_bounded(self):
+        for seed in range(5):
+            grid = Helper.random_grid(20, 15, 0.3, seed)
+            expected = grid.find_path(grid.boat, grid.treasure).cost
+            for max_nodes in (30, 100000):
+                grid = Helper.random_grid(20, 15, 0.3, seed)
+                result = grid.bounded_path(grid.boat, grid.treasure, max_nodes)
+                msg = "Seed {}: expected bounded cost {} with {} nodes, got {}"
+                msg = msg.format(seed, expected, max_nodes, result.cost)
+                self.assertEqual(result.cost, expected, msg)
+                msg = "Seed {}: expected a complete search to be optimal"
+                msg = msg.format(seed)
+                self.assertTrue(result.optimal(), msg)
+
+    def test_grid_bounded_budget(self):
+        grid = Helper.random_grid(30, 30, 0.2, 2)
+        result = grid.bounded_path(grid.boat, grid.treasure, 100,
+                                   max_expansions=10)
+        msg = "Expected a search cut short not to be reported optimal"
+        self.assertFalse(result.optimal(), msg)
+        msg = "Expected at most 10 expansions, got {}".format(result.expanded)
+        self.assertTrue(result.expanded <= 10, msg)
+        actual = grid.plot_path(grid.boat, grid.treasure).count("*")
+        msg = "Expected plot_path to search again after a search cut short"
+        self.assertTrue(actual > 0, msg)
+
+    def test_grid_bounded_unreachable(self):
+        grid = Grid("", ["B..+..+..T.", "...+..+...."])
+        with tempfile.TemporaryDirectory() as folder:
+            file_path = os.path.join(folder, "grid.map")
+            grid.save_binary(file_path)
+            tiled = Grid(file_path, tile_cache=4)
+            result = tiled.bounded_path(tiled.boat, tiled.treasure,
+                                        max_expansions=10000)
+            tiled.terrain.close()
+        msg = "Expected an unlabelled grid to prove the treasure unreachable"
+        self.assertFalse(result.found(), msg)
+        self.assertTrue(result.optimal(), msg)
+        msg = "Expected the search to stop after the boat's water, got {}"
+        msg = msg.format(result.expanded)
+        self.assertTrue(result.expanded < 100, msg)
+
+    def test_grid_file(self):
+        handles = []
+
+        class Recording(Grid):
+            @classmethod
+            def open_grid(cls, file_path):
+                handle = Grid.open_grid(file_path)
+                handles.append(handle)
+                return handle
+        with tempfile.TemporaryDirectory() as folder:
+            file_path = os.path.join(folder, "grid.txt")
+            with open(file_path, "w", newline="") as f:
+                f.write("\r\n".join(self.data) + "\r\n\r\n")
+            grid = Recording(file_path)
+        actual = (grid.width, grid.height, grid.terrain, grid.boat,
+                  grid.treasure)
+        expected = (self.grid.width, self.grid.height, self.grid.terrain,
+                    self.grid.boat, self.grid.treasure)
+        msg = "Expected the file to load as {}, got {}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+        msg = "Expected the map file to be closed"
+        self.assertTrue(handles[0].closed, msg)
+
+    def test_grid_binary(self):
+        grid = Helper.random_grid(37, 21, 0.3, 5)
+        with tempfile.TemporaryDirectory() as folder:
+            text_path = os.path.join(folder, "grid.txt")
+            binary_path = os.path.join(folder, "grid.map")
+            with open(text_path, "w") as f:
+                f.write("\n".join(grid.text_grid) + "\n")
+            mapfile.convert(text_path, binary_path)
+            loaded = Grid(binary_path)
+            size = os.path.getsize(binary_path)
+        actual = (loaded.width, loaded.height, loaded.terrain, loaded.boat,
+                  loaded.treasure)
+        expected = (grid.width, grid.height, grid.terrain, grid.boat,
+                    grid.treasure)
+        msg = "Expected the binary map to load as {}, got {}".format(
+            expected, actual)
+        self.assertEqual(actual, expected, msg)
+        expected = mapfile.ROWS + 5 * 21
+        msg = "Expected {} bytes for a 37x21 map, got {}".format(expected, size)
+        self.assertEqual(size, expected, msg)
+
+    def test_grid_binary_corrupt(self):
+        with tempfile.TemporaryDirectory() as folder:
+            file_path = os.path.join(folder, "grid.map")
+            self.grid.save_binary(file_path)
+            with open(file_path, "r+b") as f:
+                f.seek(mapfile.ROWS + 1)
+                byte = f.read(1)
+                f.seek(mapfile.ROWS + 1)
+                f.write(bytes([byte[0] ^ 1]))
+            msg = "Expected a corrupted binary map to be rejected"
+            with self.assertRaises(ValueError, msg=msg):
+                Grid(file_path)
+
+    def test_grid_tiled(self):
+        grid = Helper.random_grid(150, 90, 0.3, 6)
+        with tempfile.TemporaryDirectory() as folder:
+            file_path = os.path.join(folder, "grid.map")
+            grid.save_binary(file_path)
+            tiled = Grid(file_path, tile_cache=2)
+            result = tiled.find_path(tiled.boat, tiled.treasure)
+            actual = tiled.plot_path(tiled.boat, tiled.treasure, result)
+            result = grid.find_path(grid.boat, grid.treasure)
+            expected = grid.plot_path(grid.boat, grid.treasure, result)
+            msg = "Expected the tiled map to plot as\n{}\ngot\n{}".format(
+                expected, actual)
+            self.assertEqual(actual, expected, msg)
+            actual = tiled.find_path(tiled.boat, tiled.treasure,
+                                     method="jps").cost
+            expected = grid.find_path(grid.boat, grid.treasure,
+                                      method="jps").cost
+            msg = "Expected a path of cost {}, got {}".format(expected, actual)
+            self.assertEqual(actual, expected, msg)
+            msg = "Expected at most 2 tiles cached, got {}".format(
+                len(tiled.terrain._tiles))
+            self.assertTrue(len(tiled.terrain._tiles) <= 2, msg)
+            tiled.set_navigable(1, 0, False)
+            msg = "Expected (1, 0) to become an island"
+            self.assertFalse(tiled.is_navigable(1, 0), msg)
+            tiled.terrain.close()
+            msg = "Expected changes to a tiled map to leave the file untouched"
+            self.assertEqual(Grid(file_path).terrain, grid.terrain, msg)
+
+    def test_grid_compressed(self):
+        rows = ["B" + "." * 199] + ["." * 200] * 98 + ["." * 199 + "T"]
+        rows[50] = "." * 60 + "+" * 80 + "." * 60
+        grid = Grid("", rows)
+        compressed = Grid("", rows, compressed=True)
+        actual = len(compressed.terrain._edges)
+        msg = "Expected 4 run edges for one island, got {}".format(actual)
+        self.assertEqual(actual, 4, msg)
+        for method in ("astar", "jps"):
+            actual = compressed.find_path(compressed.boat, compressed.treasure,
+                                          method=method).cost
+            expected = grid.find_path(grid.boat, grid.treasure,
+                                      method=method).cost
+            msg = "Expected {} to cost {}, got {}".format(
+                method, expected, actual)
+            self.assertEqual(actual, expected, msg)
+        for grid in (grid, compressed):
+            grid.set_navigable(100, 50, True)
+        actual = compressed.terrain[:]
+        expected = bytes(grid.terrain)
+        msg = "Expected the compressed terrain to follow set_navigable"
+        self.assertEqual(actual, expected, msg)
+
+    def test_grid_segment_navigable(self):
+        for compressed in (False, True):
+            grid = Grid("", self.data, compressed=compressed)
+            actual = [grid.is_segment_navigable(0, 4, 2),
+                      grid.is_segment_navigable(2, 6, 3),
+                      grid.is_segment_navigable(5, 1, 4),
+                      grid.is_segment_navigable(3, 7, 3)]
+            expected = [True, True, True, False]
+            msg = "Expected segments {}, got {}".format(expected, actual)
+            self.assertEqual(actual, expected, msg)
+
+    def test_grid_ragged(self):
+        for rows in (["B..", ".+", "..T"], ["B..", "", "..T"], ["...", "..T"]):
+            msg = "Expected {} to be rejected".format(rows)
+            with self.assertRaises(ValueError, msg=msg):
+                Grid("", rows)
+
+    def test_grid_start_untouched(self):
+        boat = self.grid.boat
+        self.grid.find_path(boat, self.grid.treasure)
+        msg = "find_path should not modify the start node"
+        self.assertIsNone(boat.parent, msg)
+
+    def test_grid_unreachable(self):
+        grid = Grid("", ["B.+..", "..+.T", "..+.."])
+        actual = grid.retrace_path(grid.boat, grid.treasure)
+        msg = "Expected no path to a sealed treasure, got {}".format(actual)
+        self.assertEqual(actual, [], msg)
+
+    def test_grid_unreachable_rejected(self):
+        grid = Grid("", ["B.+..", "..+.T", "..+.."])
+        msg = "Expected 2 bodies of water, got {}".format(grid.component_count)
+        self.assertEqual(grid.component_count, 2, msg)
+        for method in ("astar", "jps", "bidirectional", "field"):
+            result = grid.find_path(grid.boat, grid.treasure, method=method)
+            msg = "Expected {} to give up without a search, expanded {}".format(
+                method, result.expanded)
+            self.assertFalse(result.found(), msg)
+            self.assertEqual(result.expanded, 0, msg)
+        actual = grid.plot_path(grid.boat, grid.treasure)
+        expected = "\n".join(["B.+..", "..+.T", "..+.."])
+        msg = "Expected an unmarked map\n{}\ngot\n{}".format(expected, actual)
+        self.assertEqual(actual, expected, msg)
+
 if __name__ == '__main__':
     unittest.main(exit=False)
\ No newline at end of file